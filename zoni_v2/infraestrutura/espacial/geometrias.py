@@ -48,6 +48,19 @@ def unir_geometrias(features: List[QgsFeature]) -> Optional[QgsGeometry]:
 
     return uniao
 
+
+def preparar_geometria(geom: QgsGeometry):
+    """
+    Cria um QgsGeometryEngine preparado para `geom`.
+
+    Útil quando a mesma geometria (ex.: o lote) é testada contra muitas
+    candidatas: o engine preparado amortiza o custo dos vértices entre as
+    chamadas de `engine.intersects(outra.constGet())`.
+    """
+    engine = QgsGeometry.createGeometryEngine(geom.constGet())
+    engine.prepareGeometry()
+    return engine
+
 class GeometriaUtils:
     """Utilitários geométricos."""
     @staticmethod
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Construção centralizada de índices espaciais das camadas vetoriais."""
+
+from qgis.core import QgsSpatialIndex, QgsVectorLayer
+
+
+def criar_indice_espacial(camada) -> QgsSpatialIndex:
+    """
+    Cria um índice espacial em lote (carga feita no C++), guardando as
+    geometrias das feições no próprio índice.
+
+    Com FlagStoreFeatureGeometries, os consumidores podem usar
+    `indice.geometry(fid)` em vez de buscar a feição novamente no provedor
+    quando só a geometria é necessária.
+    """
+    flags = QgsSpatialIndex.FlagStoreFeatureGeometries
+    if camada is None or not isinstance(camada, QgsVectorLayer):
+        return QgsSpatialIndex(flags)
+    try:
+        return QgsSpatialIndex(camada.getFeatures(), None, flags)
+    except TypeError:
+        idx = QgsSpatialIndex(flags)
+        for f in camada.getFeatures():
+            g = f.geometry()
+            if g is None or g.isEmpty():
+                continue
+            idx.addFeature(f)
+        return idx
+
+
+# ----------------------------------------------------------------------
+# CACHES POR CAMADA
+# ----------------------------------------------------------------------
+
+# Caches cujas chaves trazem o id da camada na primeira posição; todos são
+# esvaziados para a camada quando ela é editada ou removida.
+_CACHES_POR_CAMADA = []
+
+# id da camada -> [(sinal, slot)] conectados para invalidar os caches
+_CONEXOES_CAMADAS = {}
+
+
+def registrar_cache_por_camada(cache: dict) -> dict:
+    """Inclui `cache` entre os invalidados por `monitorar_camada`."""
+    _CACHES_POR_CAMADA.append(cache)
+    return cache
+
+
+def descartar_caches_camada(camada_id: str):
+    """Remove de todos os caches registrados as entradas da camada."""
+    for cache in _CACHES_POR_CAMADA:
+        for chave in [c for c in cache if c[0] == camada_id]:
+            del cache[chave]
+
+
+def monitorar_camada(camada):
+    """
+    Conecta (uma única vez por camada) os sinais de edição e remoção da
+    camada ao descarte das suas entradas em cache.
+
+    Edições que não mudam a contagem de feições (geometria ou atributo
+    alterado) também invalidam, assim como desfazer edições.
+    """
+    camada_id = camada.id()
+    if camada_id in _CONEXOES_CAMADAS:
+        return
+
+    def _descartar(*_args):
+        descartar_caches_camada(camada_id)
+
+    def _removida(*_args):
+        descartar_caches_camada(camada_id)
+        _CONEXOES_CAMADAS.pop(camada_id, None)
+
+    conexoes = [
+        (camada.dataChanged, _descartar),
+        (camada.geometryChanged, _descartar),
+        (camada.attributeValueChanged, _descartar),
+        (camada.featureAdded, _descartar),
+        (camada.featureDeleted, _descartar),
+        (camada.afterRollBack, _descartar),
+        (camada.willBeDeleted, _removida),
+    ]
+    for sinal, slot in conexoes:
+        sinal.connect(slot)
+    _CONEXOES_CAMADAS[camada_id] = conexoes
+
+
+def limpar_caches_camadas():
+    """Esvazia todos os caches por camada e desconecta os sinais (unload)."""
+    for conexoes in _CONEXOES_CAMADAS.values():
+        for sinal, slot in conexoes:
+            try:
+                sinal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                pass
+    _CONEXOES_CAMADAS.clear()
+    for cache in _CACHES_POR_CAMADA:
+        cache.clear()
+
+
+# Cache de índices por camada: chave (id da camada, nº de feições).
+# Edições e remoção da camada descartam a entrada (ver monitorar_camada).
+_CACHE_INDICES = registrar_cache_por_camada({})
+
+
+def obter_indice_espacial(camada) -> QgsSpatialIndex:
+    """
+    Retorna o índice espacial da camada, reaproveitando-o entre análises.
+
+    Útil quando muitos lotes são analisados contra a mesma camada: o índice
+    é construído na primeira chamada e reutilizado nas seguintes, até a
+    camada ser editada.
+    """
+    if camada is None or not isinstance(camada, QgsVectorLayer):
+        return criar_indice_espacial(None)
+
+    chave = (camada.id(), camada.featureCount())
+    indice = _CACHE_INDICES.get(chave)
+    if indice is None:
+        # Descarta índices antigos da mesma camada antes de guardar o novo
+        for chave_antiga in [c for c in _CACHE_INDICES if c[0] == chave[0]]:
+            del _CACHE_INDICES[chave_antiga]
+        indice = criar_indice_espacial(camada)
+        monitorar_camada(camada)
+        _CACHE_INDICES[chave] = indice
+    return indice
@@ -3,9 +3,9 @@
 from dataclasses import dataclass, field
 from typing import List, Optional
 
-from qgis.core import QgsSpatialIndex, QgsFeatureRequest
-
 from .config_camadas import obter_camada
+from .geometrias import preparar_geometria
+from .indice_espacial import criar_indice_espacial
 
 
 @dataclass
@@ -22,7 +22,7 @@ class ResultadoAPP:
 def _criar_indice(camada):
     if camada is None:
         return None
-    return QgsSpatialIndex(camada.getFeatures())
+    return criar_indice_espacial(camada)
 
 
 def _tentar_ler_largura(feicao) -> Optional[float]:
@@ -51,14 +51,16 @@ def intersecao_app(geom_lote):
 
     idx_faixa = _criar_indice(camada_faixa)
     idx_mangue = _criar_indice(camada_mangue)
+    motor_lote = preparar_geometria(geom_lote)
 
     # ---- APP Faixa NUIC ----
     if camada_faixa and idx_faixa:
         ids = idx_faixa.intersects(geom_lote.boundingBox())
-        for feicao in camada_faixa.getFeatures(QgsFeatureRequest().setFilterFids(ids)):
-            geom = feicao.geometry()
-            if not geom or not geom.intersects(geom_lote):
+        for fid in ids:
+            geom = idx_faixa.geometry(fid)
+            if not geom or not motor_lote.intersects(geom.constGet()):
                 continue
+            feicao = camada_faixa.getFeature(fid)
 
             resultado.em_app = True
             resultado.em_app_faixa_nuic = True
@@ -76,9 +78,9 @@ def intersecao_app(geom_lote):
     # ---- APP Manguezal ----
     if camada_mangue and idx_mangue:
         ids = idx_mangue.intersects(geom_lote.boundingBox())
-        for feicao in camada_mangue.getFeatures(QgsFeatureRequest().setFilterFids(ids)):
-            geom = feicao.geometry()
-            if not geom or not geom.intersects(geom_lote):
+        for fid in ids:
+            geom = idx_mangue.geometry(fid)
+            if not geom or not motor_lote.intersects(geom.constGet()):
                 continue
 
             resultado.em_app = True
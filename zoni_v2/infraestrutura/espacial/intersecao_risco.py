@@ -3,9 +3,11 @@
 from dataclasses import dataclass, field
 from typing import List, Optional
 
-from qgis.core import QgsSpatialIndex, QgsFeatureRequest
+from qgis.core import QgsFeatureRequest
 
 from .config_camadas import obter_camada
+from .geometrias import preparar_geometria
+from .indice_espacial import obter_indice_espacial
 
 
 @dataclass
@@ -16,41 +18,73 @@ class ResultadoRisco:
     notas: List[str] = field(default_factory=list)
 
 
-def _verificar_classe(camada_papel, geom_lote, campos_classe=None):
+CAMPOS_CLASSE_RISCO = ["CLASSE", "classe", "NIVEL", "nivel"]
+
+
+@dataclass
+class _CamadaClasse:
+    """Camada de risco pronta para consulta: índice e campos de classe resolvidos."""
+    camada: object
+    indice: object
+    indices_classe: List[int]
+
+
+def _preparar_camada_classe(camada_papel, campos_classe=None) -> Optional[_CamadaClasse]:
     camada = obter_camada(camada_papel)
     if camada is None:
+        return None
+
+    campos = camada.fields()
+    indices_classe = [
+        idx for idx in (campos.indexOf(nome) for nome in (campos_classe or []))
+        if idx >= 0
+    ]
+    return _CamadaClasse(
+        camada=camada,
+        # Índice reaproveitado entre análises (descartado se a camada for editada)
+        indice=obter_indice_espacial(camada),
+        indices_classe=indices_classe,
+    )
+
+
+def _verificar_classe(preparada: Optional[_CamadaClasse], geom_lote):
+    if preparada is None:
         return None, None
 
-    indice = QgsSpatialIndex(camada.getFeatures())
+    camada = preparada.camada
+    indice = preparada.indice
+    indices_classe = preparada.indices_classe
+
     ids = indice.intersects(geom_lote.boundingBox())
+    if not ids:
+        return None, None
+    motor_lote = preparar_geometria(geom_lote)
 
     valor = None
     feicao_encontrada = None
 
-    for feicao in camada.getFeatures(QgsFeatureRequest().setFilterFids(ids)):
-        geom = feicao.geometry()
-        if not geom or not geom.intersects(geom_lote):
+    for fid in ids:
+        geom = indice.geometry(fid)
+        if not geom or not motor_lote.intersects(geom.constGet()):
             continue
-        feicao_encontrada = feicao
-        nomes = feicao.fields().names()
-        if campos_classe:
-            for nome in campos_classe:
-                if nome in nomes:
-                    valor = feicao[nome]
-                    break
+
+        # Só o primeiro acerto interessa: carrega apenas os campos de classe,
+        # sem geometria (já testada pelo índice).
+        req = QgsFeatureRequest(fid).setFlags(QgsFeatureRequest.NoGeometry)
+        req.setSubsetOfAttributes(indices_classe)
+        feicao_encontrada = next(camada.getFeatures(req), None)
+        if feicao_encontrada is not None and indices_classe:
+            valor = feicao_encontrada[indices_classe[0]]
         break
 
     return valor, feicao_encontrada
 
 
-def intersecao_risco(geom_lote):
+def intersecao_risco(geom_lote) -> ResultadoRisco:
     resultado = ResultadoRisco()
 
-    classe_inund, feat_inund = _verificar_classe(
-        "susc_inundacao",
-        geom_lote,
-        campos_classe=["CLASSE", "classe", "NIVEL", "nivel"],
-    )
+    inundacao = _preparar_camada_classe("susc_inundacao", CAMPOS_CLASSE_RISCO)
+    classe_inund, feat_inund = _verificar_classe(inundacao, geom_lote)
     if feat_inund is not None:
         resultado.classe_inundacao = str(classe_inund) if classe_inund is not None else None
         resultado.flags.append("RISCO_INUNDACAO")
@@ -59,11 +93,8 @@ def intersecao_risco(geom_lote):
             msg += f" (classe {classe_inund})."
         resultado.notas.append(msg)
 
-    classe_mov, feat_mov = _verificar_classe(
-        "susc_mov_massa",
-        geom_lote,
-        campos_classe=["CLASSE", "classe", "NIVEL", "nivel"],
-    )
+    mov_massa = _preparar_camada_classe("susc_mov_massa", CAMPOS_CLASSE_RISCO)
+    classe_mov, feat_mov = _verificar_classe(mov_massa, geom_lote)
     if feat_mov is not None:
         resultado.classe_movimento_massa = str(classe_mov) if classe_mov is not None else None
         resultado.flags.append("RISCO_MOVIMENTO_MASSA")
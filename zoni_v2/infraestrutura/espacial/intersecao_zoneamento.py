@@ -3,9 +3,9 @@
 from dataclasses import dataclass, field
 from typing import List, Optional
 
-from qgis.core import QgsFeatureRequest, QgsSpatialIndex
-
 from .config_camadas import obter_camada
+from .geometrias import preparar_geometria
+from .indice_espacial import obter_indice_espacial
 
 
 @dataclass
@@ -17,11 +17,16 @@ class ResultadoZoneamento:
     mensagens: List[str] = field(default_factory=list)
 
 
-def _obter_atributo(feicao, candidatos):
-    nomes = feicao.fields().names()
+def _mapear_campos(camada):
+    """Retorna {nome_campo: índice} da camada, calculado uma única vez."""
+    return {campo.name(): i for i, campo in enumerate(camada.fields())}
+
+
+def _obter_atributo(feicao, candidatos, indices_campos):
     for nome in candidatos:
-        if nome in nomes:
-            return feicao[nome]
+        idx = indices_campos.get(nome)
+        if idx is not None:
+            return feicao[idx]
     return None
 
 
@@ -33,36 +38,54 @@ def intersecao_zoneamento(geom_lote):
         resultado.mensagens.append("Camada de zoneamento não encontrada no projeto.")
         return resultado
 
-    indice = QgsSpatialIndex(camada_zon.getFeatures())
-    ids = indice.intersects(geom_lote.boundingBox())
+    # Mesmo índice (em cache) usado por calcular_zoneamento_incidente
+    indice = obter_indice_espacial(camada_zon)
+    lote_bbox = geom_lote.boundingBox()
+    ids = indice.intersects(lote_bbox)
+    motor_lote = preparar_geometria(geom_lote)
 
-    melhor_feicao = None
+    melhor_fid = None
     melhor_area = 0.0
 
-    for feicao in camada_zon.getFeatures(QgsFeatureRequest().setFilterFids(ids)):
-        geom = feicao.geometry()
-        if not geom or not geom.intersects(geom_lote):
+    for fid in ids:
+        geom = indice.geometry(fid)
+        if not geom or not motor_lote.intersects(geom.constGet()):
             continue
+
+        # Caso dominante: lote inteiro dentro da zona. Nenhuma outra zona
+        # pode superar a área total do lote, então dispensa o recorte.
+        if geom.boundingBox().contains(lote_bbox) and motor_lote.within(geom.constGet()):
+            melhor_area = geom_lote.area()
+            melhor_fid = fid
+            break
+
         inter = geom.intersection(geom_lote)
         area = inter.area()
         if area > melhor_area:
             melhor_area = area
-            melhor_feicao = feicao
+            melhor_fid = fid
 
-    if melhor_feicao is None:
+    if melhor_fid is None:
         resultado.mensagens.append("Lote não intersecta a camada de zoneamento.")
         return resultado
 
+    melhor_feicao = camada_zon.getFeature(melhor_fid)
+    indices_campos = _mapear_campos(camada_zon)
+
     resultado.zona = _obter_atributo(
         melhor_feicao,
         ["zona", "ZONA", "Zona", "cod_zona", "COD_ZONA", "SIGLA_ZONA"],
+        indices_campos,
     )
     resultado.macrozona = _obter_atributo(
         melhor_feicao,
         ["macrozona", "MACROZONA", "Macrozona", "macro", "MACRO"],
+        indices_campos,
     )
 
-    eixo_attr = _obter_atributo(melhor_feicao, ["eixo", "EIXO", "eixos", "EIXOS"])
+    eixo_attr = _obter_atributo(
+        melhor_feicao, ["eixo", "EIXO", "eixos", "EIXOS"], indices_campos
+    )
     if eixo_attr:
         if isinstance(eixo_attr, str):
             partes = [p.strip() for p in eixo_attr.replace(",", ";").split(";") if p.strip()]
@@ -73,6 +96,7 @@ def intersecao_zoneamento(geom_lote):
     esp_attr = _obter_atributo(
         melhor_feicao,
         ["especial", "ESPECIAL", "zona_esp", "ZONA_ESP"],
+        indices_campos,
     )
     if esp_attr:
         if isinstance(esp_attr, str):
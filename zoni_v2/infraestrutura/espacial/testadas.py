@@ -18,6 +18,9 @@ Pressupõe que:
 - as camadas de lotes e logradouros usam o mesmo CRS.
 """
 
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple
 
@@ -25,12 +28,24 @@ from qgis.core import (
     QgsVectorLayer,
     QgsGeometry,
     QgsPointXY,
+    QgsRectangle,
+    QgsFeatureRequest,
     QgsSpatialIndex,
+    QgsVectorLayerFeatureSource,
 )
 
+from .indice_espacial import criar_indice_espacial
+
 # Distância padrão máxima do "raio" lançado para tentar encontrar o logradouro
 DEFAULT_MAX_DIST_TESTADA_M = 20.0
 
+# Abaixo desta quantidade de segmentos, o custo de criar o pool de threads
+# supera o ganho do processamento paralelo
+MIN_SEGMENTOS_PARALELO = 16
+
+# Arestas da borda menores que isto são tratadas como degeneradas (comprimento nulo)
+TOLERANCIA_SEGMENTO_M = 1e-9
+
 
 # ----------------------------------------------------------------------
 # Estruturas de dados
@@ -180,8 +195,6 @@ def _normal_e_ponto_fora(
     if seg is None or seg.isEmpty() or lote_geom is None or lote_geom.isEmpty():
         return None
 
-    from qgis.core import QgsGeometry as _QgsGeometry
-
     length = seg.length()
     if length <= 0:
         return None
@@ -217,8 +230,8 @@ def _normal_e_ponto_fora(
     cand1 = QgsPointXY(mid.x() + nx1 * delta, mid.y() + ny1 * delta)
     cand2 = QgsPointXY(mid.x() + nx2 * delta, mid.y() + ny2 * delta)
 
-    g1 = _QgsGeometry.fromPointXY(cand1)
-    g2 = _QgsGeometry.fromPointXY(cand2)
+    g1 = QgsGeometry.fromPointXY(cand1)
+    g2 = QgsGeometry.fromPointXY(cand2)
 
     inside1 = lote_geom.contains(g1)
     inside2 = lote_geom.contains(g2)
@@ -237,20 +250,9 @@ def _criar_indice_lotes(camada_lotes: QgsVectorLayer) -> QgsSpatialIndex:
     """
     Cria um índice espacial para os lotes.
 
-    Usa o construtor com iterador de features (API atual).
+    As geometrias ficam guardadas no índice (`index_lotes.geometry(fid)`).
     """
-    if camada_lotes is None or not isinstance(camada_lotes, QgsVectorLayer):
-        return QgsSpatialIndex()
-    try:
-        return QgsSpatialIndex(camada_lotes.getFeatures())
-    except TypeError:
-        idx = QgsSpatialIndex()
-        for f in camada_lotes.getFeatures():
-            g = f.geometry()
-            if g is None or g.isEmpty():
-                continue
-            idx.addFeature(f)
-        return idx
+    return criar_indice_espacial(camada_lotes)
 
 
 def _criar_indice_vias(
@@ -258,49 +260,29 @@ def _criar_indice_vias(
 ) -> Tuple[QgsSpatialIndex, Dict[int, object]]:
     """Cria índice espacial e dicionário {id: feature} para as vias."""
     if camada_logradouros is None or not isinstance(camada_logradouros, QgsVectorLayer):
-        return QgsSpatialIndex(), {}
+        return criar_indice_espacial(None), {}
 
-    try:
-        idx = QgsSpatialIndex(camada_logradouros.getFeatures())
-        vias_por_id: Dict[int, object] = {
-            f.id(): f for f in camada_logradouros.getFeatures()
-        }
-        return idx, vias_por_id
-    except TypeError:
-        idx = QgsSpatialIndex()
-        vias_por_id = {}
-        for f in camada_logradouros.getFeatures():
-            g = f.geometry()
-            if g is None or g.isEmpty():
-                continue
-            idx.addFeature(f)
-            vias_por_id[f.id()] = f
-        return idx, vias_por_id
+    idx = criar_indice_espacial(camada_logradouros)
+    vias_por_id: Dict[int, object] = {
+        f.id(): f for f in camada_logradouros.getFeatures()
+    }
+    return idx, vias_por_id
 
 
 def _ponto_cai_em_algum_lote(
     pt: QgsPointXY,
-    camada_lotes: QgsVectorLayer,
     index_lotes: QgsSpatialIndex,
 ) -> bool:
     """
-    Verifica se o ponto 'pt' cai dentro de algum lote da camada.
+    Verifica se o ponto 'pt' cai dentro de algum lote indexado.
 
     Como a gleba já vem unificada em lote_geom, QUALQUER lote contendo o
     ponto é tratado como lote confrontante (divisa).
     """
-    if camada_lotes is None or not isinstance(camada_lotes, QgsVectorLayer):
-        return False
-
-    from qgis.core import QgsGeometry as _QgsGeometry
-
-    pt_geom = _QgsGeometry.fromPointXY(pt)
+    pt_geom = QgsGeometry.fromPointXY(pt)
     cand_ids = index_lotes.intersects(pt_geom.boundingBox())
     for fid in cand_ids:
-        feat = camada_lotes.getFeature(fid)
-        if feat is None or not feat.isValid():
-            continue
-        g = feat.geometry()
+        g = index_lotes.geometry(fid)
         if g is None or g.isEmpty():
             continue
         if g.contains(pt_geom):
@@ -310,40 +292,37 @@ def _ponto_cai_em_algum_lote(
 
 def _obter_confrontante_para_ponto(
     pt: QgsPointXY,
-    camada_lotes: QgsVectorLayer,
+    fonte_lotes: Optional[QgsVectorLayerFeatureSource],
     index_lotes: QgsSpatialIndex,
-    campo_proprietario: Optional[str],
+    idx_proprietario: int,
 ) -> Optional[str]:
     """
     Dado um ponto "para fora" do lote, tenta identificar o lote confrontante
     e retorna o valor do campo de proprietário, se houver.
+
+    `idx_proprietario` é o índice do campo na camada de lotes (-1 se não
+    houver). Lê as feições por uma QgsVectorLayerFeatureSource, que pode
+    ser usada fora do thread principal.
     """
-    if (
-        camada_lotes is None
-        or not isinstance(camada_lotes, QgsVectorLayer)
-        or campo_proprietario is None
-    ):
+    if fonte_lotes is None or idx_proprietario < 0:
         return None
 
-    from qgis.core import QgsGeometry as _QgsGeometry
-
-    pt_geom = _QgsGeometry.fromPointXY(pt)
+    pt_geom = QgsGeometry.fromPointXY(pt)
     cand_ids = index_lotes.intersects(pt_geom.boundingBox())
     for fid in cand_ids:
-        feat = camada_lotes.getFeature(fid)
-        if feat is None or not feat.isValid():
-            continue
-        g = feat.geometry()
+        g = index_lotes.geometry(fid)
         if g is None or g.isEmpty():
             continue
         if not g.contains(pt_geom):
             continue
 
-        try:
-            val = feat[campo_proprietario]
-        except KeyError:
-            val = None
+        req = QgsFeatureRequest(fid).setFlags(QgsFeatureRequest.NoGeometry)
+        req.setSubsetOfAttributes([idx_proprietario])
+        feat = next(fonte_lotes.getFeatures(req), None)
+        if feat is None or not feat.isValid():
+            continue
 
+        val = feat.attribute(idx_proprietario)
         if val is None:
             continue
 
@@ -367,8 +346,6 @@ def _segmentar_borda_lote(lote_geom: QgsGeometry) -> List[QgsGeometry]:
     if lote_geom is None or lote_geom.isEmpty():
         return []
 
-    from qgis.core import QgsGeometry as _QgsGeometry
-
     segmentos: List[QgsGeometry] = []
 
     try:
@@ -378,33 +355,157 @@ def _segmentar_borda_lote(lote_geom: QgsGeometry) -> List[QgsGeometry]:
 
     if is_multi:
         mpol = lote_geom.asMultiPolygon()  # [[ring1, ring2,...], ...]
-        for poly in mpol:
-            for ring in poly:
-                n = len(ring)
-                if n < 2:
-                    continue
-                for i in range(n - 1):
-                    p1 = ring[i]
-                    p2 = ring[i + 1]
-                    seg = _QgsGeometry.fromPolylineXY([QgsPointXY(p1), QgsPointXY(p2)])
-                    if seg and not seg.isEmpty():
-                        segmentos.append(seg)
     else:
-        poly = lote_geom.asPolygon()  # [ring1, ring2,...]
+        mpol = [lote_geom.asPolygon()]  # [ring1, ring2,...]
+
+    # Os vértices de asPolygon()/asMultiPolygon() já são QgsPointXY:
+    # são passados direto, sem reembrulhar cada ponto. Arestas degeneradas
+    # (vértices repetidos, comuns em polígonos vindos de CAD) são descartadas
+    # pelas coordenadas, antes de criar qualquer QgsGeometry.
+    tol2 = TOLERANCIA_SEGMENTO_M * TOLERANCIA_SEGMENTO_M
+    for poly in mpol:
         for ring in poly:
-            n = len(ring)
-            if n < 2:
-                continue
-            for i in range(n - 1):
-                p1 = ring[i]
-                p2 = ring[i + 1]
-                seg = _QgsGeometry.fromPolylineXY([QgsPointXY(p1), QgsPointXY(p2)])
+            for p1, p2 in zip(ring, ring[1:]):
+                dx = p2.x() - p1.x()
+                dy = p2.y() - p1.y()
+                if dx * dx + dy * dy <= tol2:
+                    continue
+                seg = QgsGeometry.fromPolylineXY([p1, p2])
                 if seg and not seg.isEmpty():
                     segmentos.append(seg)
 
     return segmentos
 
 
+# ----------------------------------------------------------------------
+# Classificação de um segmento (executada em paralelo)
+# ----------------------------------------------------------------------
+
+
+@dataclass
+class _ContextoLimites:
+    """Estado somente leitura compartilhado pela classificação dos segmentos."""
+    lote_geom: QgsGeometry
+    fonte_lotes: Optional[QgsVectorLayerFeatureSource]
+    index_lotes: QgsSpatialIndex
+    idx_proprietario: int
+    index_vias: QgsSpatialIndex
+    vias_por_id: Dict[int, object]
+    idx_nome_log: int
+    max_dist_m: float
+
+
+def _classificar_segmento(
+    idx_seg: int,
+    seg: QgsGeometry,
+    ctx: _ContextoLimites,
+) -> Optional[SegmentoTestada]:
+    """
+    Classifica um segmento de limite como TESTADA ou DIVISA.
+
+    Não escreve em nenhum estado compartilhado: os agregados são montados
+    depois, no thread principal.
+    """
+    if seg is None or seg.isEmpty():
+        return None
+
+    comp_m = float(seg.length())
+    if comp_m <= 0:
+        return None
+
+    # Valores padrão: DIVISA sem confrontante
+    logradouro_atribuido: Optional[str] = None
+    tipo_limite = "DIVISA"
+    confrontante_atribuido: Optional[str] = None
+
+    # 1) Normal "para fora" + ponto fora
+    res_norm = _normal_e_ponto_fora(seg, ctx.lote_geom)
+    if res_norm is not None:
+        (nx, ny), pt_out = res_norm
+
+        # 1.a) Primeiro verifica se o ponto fora cai em ALGUM lote
+        tem_lote_confrontante = (
+            ctx.fonte_lotes is not None
+            and _ponto_cai_em_algum_lote(pt_out, ctx.index_lotes)
+        )
+
+        if tem_lote_confrontante:
+            # DIVISA: tenta pegar nome do confrontante, se houver campo
+            if ctx.idx_proprietario >= 0:
+                confrontante_atribuido = _obter_confrontante_para_ponto(
+                    pt_out,
+                    ctx.fonte_lotes,
+                    ctx.index_lotes,
+                    ctx.idx_proprietario,
+                )
+            tipo_limite = "DIVISA"
+            logradouro_atribuido = None
+        else:
+            # Não há lote do lado de fora → pode ser TESTADA ou fronteira "solta"
+            if ctx.idx_nome_log >= 0:
+                mid = seg.interpolate(comp_m / 2.0).asPoint()
+                mx, my = mid.x(), mid.y()
+                pt_inicio = QgsPointXY(mx, my)
+                pt_fim = QgsPointXY(
+                    mx + nx * ctx.max_dist_m,
+                    my + ny * ctx.max_dist_m,
+                )
+
+                # O retângulo do raio sai direto das extremidades; a geometria
+                # do raio só é montada se o índice devolver candidatos.
+                raio_bbox = QgsRectangle(pt_inicio, pt_fim)
+                candidatos = ctx.index_vias.intersects(raio_bbox)
+                raio_geom = (
+                    QgsGeometry.fromPolylineXY([pt_inicio, pt_fim]) if candidatos else None
+                )
+                melhor_id = None
+                melhor_t = None
+
+                # Escolhe a via atingida primeiro ao longo do raio: o parâmetro
+                # t (distância a partir de mid na direção da normal) sai da
+                # própria interseção, sem um distance() extra por candidato.
+                for fid in candidatos:
+                    g_via = ctx.index_vias.geometry(fid)
+                    if g_via is None or g_via.isEmpty():
+                        continue
+                    inter = g_via.intersection(raio_geom)
+                    if inter is None or inter.isEmpty():
+                        continue
+
+                    for v in inter.vertices():
+                        t = (v.x() - mx) * nx + (v.y() - my) * ny
+                        if t < 0 or t > ctx.max_dist_m:
+                            continue
+                        if melhor_t is None or t < melhor_t:
+                            melhor_t = t
+                            melhor_id = fid
+
+                if melhor_id is not None:
+                    feat_via = ctx.vias_por_id.get(melhor_id)
+                    if feat_via is not None:
+                        val = feat_via.attribute(ctx.idx_nome_log)
+                        if val is not None:
+                            logradouro_atribuido = str(val)
+
+            if logradouro_atribuido:
+                tipo_limite = "TESTADA"
+                confrontante_atribuido = None
+            else:
+                tipo_limite = "DIVISA"
+                # fronteira "solta": divisa com área não loteada / APP / mar, etc.
+
+    # Se não conseguiu normal, permanece como DIVISA sem confrontante
+
+    return SegmentoTestada(
+        id_segmento=idx_seg,
+        geom=seg,
+        comprimento_m=comp_m,
+        logradouro=logradouro_atribuido,
+        tipo_limite=tipo_limite,
+        confrontante=confrontante_atribuido,
+    )
+
+
 # ----------------------------------------------------------------------
 # Função principal
 # ----------------------------------------------------------------------
@@ -434,8 +535,6 @@ def calcular_testadas_e_logradouros(
             - somatório de comprimento de TESTADAS por logradouro;
             - somatório de comprimento de DIVISAS por confrontante.
     """
-    from qgis.core import QgsGeometry as _QgsGeometry, QgsPointXY as _QgsPointXY
-
     if lote_geom is None or lote_geom.isEmpty():
         return ResultadoTestadas(segmentos=[], testadas_por_logradouro={})
 
@@ -446,122 +545,64 @@ def calcular_testadas_e_logradouros(
     campo_nome_log = _achar_campo_nome_logradouro(camada_logradouros) if tem_vias else None
     campo_proprietario = _achar_campo_proprietario(camada_lotes) if tem_lotes else None
 
-    index_vias, vias_por_id = _criar_indice_vias(camada_logradouros) if tem_vias else (QgsSpatialIndex(), {})
-    index_lotes = _criar_indice_lotes(camada_lotes) if tem_lotes else QgsSpatialIndex()
+    index_vias, vias_por_id = _criar_indice_vias(camada_logradouros)
+    index_lotes = _criar_indice_lotes(camada_lotes)
+
+    # Estado compartilhado (somente leitura) entre as threads de trabalho.
+    # O acesso à camada de lotes nas threads é feito pela fonte de feições,
+    # que é a forma thread-safe de ler um QgsVectorLayer.
+    ctx = _ContextoLimites(
+        lote_geom=lote_geom,
+        fonte_lotes=QgsVectorLayerFeatureSource(camada_lotes) if tem_lotes else None,
+        index_lotes=index_lotes,
+        idx_proprietario=(
+            camada_lotes.fields().indexOf(campo_proprietario) if campo_proprietario else -1
+        ),
+        index_vias=index_vias,
+        vias_por_id=vias_por_id,
+        idx_nome_log=(
+            camada_logradouros.fields().indexOf(campo_nome_log) if campo_nome_log else -1
+        ),
+        max_dist_m=max_dist_m,
+    )
 
     segmentos_geom = _segmentar_borda_lote(lote_geom)
 
-    resultado_segmentos: List[SegmentoTestada] = []
-    testadas_por_logradouro: Dict[str, float] = {}
-    confrontantes_por_proprietario: Dict[str, float] = {}
+    def _processar(item):
+        idx_seg, seg = item
+        return _classificar_segmento(idx_seg, seg, ctx)
 
-    for idx_seg, seg in enumerate(segmentos_geom, start=1):
-        if seg is None or seg.isEmpty():
-            continue
-
-        comp_m = float(seg.length())
-        if comp_m <= 0:
-            continue
-
-        # Valores padrão: DIVISA sem confrontante
-        logradouro_atribuido: Optional[str] = None
-        tipo_limite = "DIVISA"
-        confrontante_atribuido: Optional[str] = None
-
-        # 1) Normal "para fora" + ponto fora
-        res_norm = _normal_e_ponto_fora(seg, lote_geom)
-        if res_norm is not None:
-            (nx, ny), pt_out = res_norm
-
-            # 1.a) Primeiro verifica se o ponto fora cai em ALGUM lote
-            tem_lote_confrontante = (
-                tem_lotes and _ponto_cai_em_algum_lote(pt_out, camada_lotes, index_lotes)
-            )
-
-            if tem_lote_confrontante:
-                # DIVISA: tenta pegar nome do confrontante, se houver campo
-                if campo_proprietario is not None:
-                    confrontante_atribuido = _obter_confrontante_para_ponto(
-                        pt_out,
-                        camada_lotes,
-                        index_lotes,
-                        campo_proprietario,
-                    )
-                tipo_limite = "DIVISA"
-                logradouro_atribuido = None
-            else:
-                # Não há lote do lado de fora → pode ser TESTADA ou fronteira "solta"
-                if tem_vias and campo_nome_log is not None:
-                    seg_len = seg.length()
-                    mid = seg.interpolate(seg_len / 2.0).asPoint()
-                    pt_inicio = _QgsPointXY(mid.x(), mid.y())
-                    pt_fim = _QgsPointXY(
-                        mid.x() + nx * max_dist_m,
-                        mid.y() + ny * max_dist_m,
-                    )
-                    raio_geom = _QgsGeometry.fromPolylineXY([pt_inicio, pt_fim])
-
-                    candidatos = index_vias.intersects(raio_geom.boundingBox())
-                    melhor_id = None
-                    melhor_dist = None
-
-                    for fid in candidatos:
-                        feat_via = vias_por_id.get(fid)
-                        if feat_via is None:
-                            continue
-                        g_via = feat_via.geometry()
-                        if g_via is None or g_via.isEmpty():
-                            continue
-                        if not g_via.intersects(raio_geom):
-                            continue
+    itens = list(enumerate(segmentos_geom, start=1))
+    if len(itens) >= MIN_SEGMENTOS_PARALELO:
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+            classificados = list(ex.map(_processar, itens))
+    else:
+        classificados = [_processar(item) for item in itens]
 
-                        dist = g_via.distance(_QgsGeometry.fromPointXY(mid))
-                        if melhor_dist is None or dist < melhor_dist:
-                            melhor_dist = dist
-                            melhor_id = fid
+    resultado_segmentos: List[SegmentoTestada] = []
+    testadas_por_logradouro: Dict[str, float] = defaultdict(float)
+    confrontantes_por_proprietario: Dict[str, float] = defaultdict(float)
 
-                    if melhor_id is not None:
-                        feat_via = vias_por_id.get(melhor_id)
-                        if feat_via is not None:
-                            try:
-                                val = feat_via[campo_nome_log]
-                            except KeyError:
-                                val = None
-                            if val is not None:
-                                logradouro_atribuido = str(val)
-
-                if logradouro_atribuido:
-                    tipo_limite = "TESTADA"
-                    confrontante_atribuido = None
-                else:
-                    tipo_limite = "DIVISA"
-                    # fronteira "solta": divisa com área não loteada / APP / mar, etc.
-
-        # Se não conseguiu normal, permanece como DIVISA sem confrontante
-
-        seg_testada = SegmentoTestada(
-            id_segmento=idx_seg,
-            geom=seg,
-            comprimento_m=comp_m,
-            logradouro=logradouro_atribuido,
-            tipo_limite=tipo_limite,
-            confrontante=confrontante_atribuido,
-        )
+    # Agregação no thread principal, preservando a ordem dos segmentos
+    for seg_testada in classificados:
+        if seg_testada is None:
+            continue
         resultado_segmentos.append(seg_testada)
 
-        # Agregados
+        comp_m = seg_testada.comprimento_m
+        logradouro_atribuido = seg_testada.logradouro
+        confrontante_atribuido = seg_testada.confrontante
+
         if logradouro_atribuido:
-            atual = testadas_por_logradouro.get(logradouro_atribuido, 0.0)
-            testadas_por_logradouro[logradouro_atribuido] = atual + comp_m
+            testadas_por_logradouro[logradouro_atribuido] += comp_m
 
-        if tipo_limite == "DIVISA" and confrontante_atribuido:
-            atual_c = confrontantes_por_proprietario.get(confrontante_atribuido, 0.0)
-            confrontantes_por_proprietario[confrontante_atribuido] = atual_c + comp_m
+        if seg_testada.tipo_limite == "DIVISA" and confrontante_atribuido:
+            confrontantes_por_proprietario[confrontante_atribuido] += comp_m
 
     return ResultadoTestadas(
         segmentos=resultado_segmentos,
-        testadas_por_logradouro=testadas_por_logradouro,
-        confrontantes_por_proprietario=confrontantes_por_proprietario,
+        testadas_por_logradouro=dict(testadas_por_logradouro),
+        confrontantes_por_proprietario=dict(confrontantes_por_proprietario),
     )
 
 class TestadasService:
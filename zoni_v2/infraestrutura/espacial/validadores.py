@@ -5,6 +5,30 @@ from qgis.core import QgsFeature
 from typing import List
 
 
+class _UnionFind:
+    """Union-Find mínimo (compressão de caminho) para conectividade de lotes."""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.count = n
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> bool:
+        ra = self.find(a)
+        rb = self.find(b)
+        if ra == rb:
+            return False
+        self.parent[rb] = ra
+        self.count -= 1
+        return True
+
+
 def lotes_sao_contiguos(features: List[QgsFeature]) -> bool:
     """
     Verifica se os lotes são contíguus (formam uma única região conexa).
@@ -35,31 +59,21 @@ def lotes_sao_contiguos(features: List[QgsFeature]) -> bool:
     if len(geoms) <= 1:
         return len(geoms) == n  # só é contíguo se todos eram válidos e há pelo menos 1
 
-    # Constrói grafo de adjacência (usando intersects)
-    adj = {i: [] for i in range(len(geoms))}
+    # Conectividade via Union-Find: une os pares que se intersectam e
+    # encerra assim que todos os lotes formarem um único componente.
+    uf = _UnionFind(len(geoms))
 
     for i in range(len(geoms)):
         gi = geoms[i]
         for j in range(i + 1, len(geoms)):
-            gj = geoms[j]
-            if gi.intersects(gj):
-                adj[i].append(j)
-                adj[j].append(i)
-
-    # Verifica se o grafo é conexo a partir do primeiro vértice
-    visitados = set()
-    pilha = [0]
-
-    while pilha:
-        idx = pilha.pop()
-        if idx in visitados:
-            continue
-        visitados.add(idx)
-        for viz in adj[idx]:
-            if viz not in visitados:
-                pilha.append(viz)
-
-    return len(visitados) == len(geoms)
+            if uf.find(i) == uf.find(j):
+                continue
+            if gi.intersects(geoms[j]):
+                uf.union(i, j)
+                if uf.count == 1:
+                    return True
+
+    return uf.count == 1
 
 
 class ValidadorGeometrias:
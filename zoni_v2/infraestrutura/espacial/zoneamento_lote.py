@@ -9,11 +9,30 @@ Este módulo NÃO faz interpretação jurídica, apenas:
 - calcula área por código de zona e percentuais.
 """
 
+import logging
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
-from qgis.core import QgsVectorLayer, QgsFeature, QgsGeometry
+from qgis.core import (
+    QgsVectorLayer,
+    QgsFeature,
+    QgsGeometry,
+    QgsFeatureRequest,
+    NULL,
+)
 
+from .geometrias import preparar_geometria
+from .indice_espacial import monitorar_camada, obter_indice_espacial, registrar_cache_por_camada
+
+log = logging.getLogger(__name__)
+
+
+# Quantidade de feições candidatas por bloco de processamento paralelo
+TAMANHO_BLOCO_ZONEAMENTO = 1000
 
 # Ordem de prioridade para achar o campo de código da zona
 CAMPOS_CODIGO_ZONA_CANDIDATOS = [
@@ -35,7 +54,7 @@ CAMPOS_CODIGO_ZONA_CANDIDATOS = [
 # MODELO DE RESULTADO
 # ----------------------------------------------------------------------
 
-@dataclass
+@dataclass(frozen=True, eq=False)
 class ResultadoZoneamentoGeom:
     """
     Resultado geométrico da interseção do lote com o zoneamento.
@@ -44,17 +63,72 @@ class ResultadoZoneamentoGeom:
     areas_por_zona: área em m² por código de zona
     area_total_zoneada: soma das áreas incidentes em m²
     percentuais: área de cada zona em relação ao total (0–100)
+
+    Com __slots__ e atributos somente leitura (frozen), já que é criado uma
+    vez por lote e só lido depois (útil em processamento de muitos lotes).
+    A lista e os dicionários internos não são copiados nem congelados: não
+    devem ser alterados por quem consome o resultado. Comparação e hash são
+    por identidade (eq=False), pois os campos não são hasheáveis.
     """
+    __slots__ = ("zonas", "areas_por_zona", "area_total_zoneada", "percentuais")
+
     zonas: List[str]
     areas_por_zona: Dict[str, float]
     area_total_zoneada: float
     percentuais: Dict[str, float]
 
+    @classmethod
+    def vazio(cls) -> "ResultadoZoneamentoGeom":
+        return cls([], {}, 0.0, {})
+
+    @classmethod
+    def de_areas(cls, areas_por_zona: Dict[str, float]) -> "ResultadoZoneamentoGeom":
+        """Monta o resultado (zonas, total e percentuais) a partir das áreas por zona."""
+        if not areas_por_zona:
+            return cls.vazio()
+
+        # Uma passada sobre os itens ordenados gera zonas e total; os
+        # percentuais reaproveitam a mesma lista.
+        itens = sorted(areas_por_zona.items())
+        zonas = []
+        area_total = 0.0
+        for z, a in itens:
+            zonas.append(z)
+            area_total += a
+
+        if area_total <= 0:
+            percentuais = dict.fromkeys(zonas, 0.0)
+        else:
+            fator = 100.0 / area_total
+            percentuais = {z: a * fator for z, a in itens}
+
+        return cls(
+            zonas=zonas,
+            areas_por_zona=dict(areas_por_zona),
+            area_total_zoneada=area_total,
+            percentuais=percentuais,
+        )
+
 
 # ----------------------------------------------------------------------
 # DETECÇÃO DO CAMPO DE ZONA
 # ----------------------------------------------------------------------
 
+# Cache dos nomes de campo por camada: chave (id da camada, nº de campos)
+_CACHE_NOMES_CAMPOS: Dict[Tuple[str, int], FrozenSet[str]] = {}
+
+
+def _nomes_campos_camada(camada: QgsVectorLayer) -> FrozenSet[str]:
+    """Conjunto de nomes de campo da camada, calculado uma vez por camada."""
+    campos = camada.fields()
+    chave = (camada.id(), campos.count())
+    nomes = _CACHE_NOMES_CAMPOS.get(chave)
+    if nomes is None:
+        nomes = frozenset(campos.names())
+        _CACHE_NOMES_CAMPOS[chave] = nomes
+    return nomes
+
+
 def detectar_campo_codigo_zona(
     camada_zoneamento: QgsVectorLayer,
     campo_forcado: Optional[str] = None,
@@ -68,7 +142,7 @@ def detectar_campo_codigo_zona(
     if camada_zoneamento is None or not isinstance(camada_zoneamento, QgsVectorLayer):
         return None
 
-    nomes_campos = [f.name() for f in camada_zoneamento.fields()]
+    nomes_campos = _nomes_campos_camada(camada_zoneamento)
 
     # Se o usuário informou um campo específico, respeitar
     if campo_forcado and campo_forcado in nomes_campos:
@@ -99,60 +173,175 @@ def calcular_zoneamento_incidente(
     - camada_zoneamento está no mesmo CRS do lote.
     """
     if lote_geom is None or lote_geom.isEmpty():
-        return ResultadoZoneamentoGeom([], {}, 0.0, {})
+        return ResultadoZoneamentoGeom.vazio()
 
     if camada_zoneamento is None or not isinstance(camada_zoneamento, QgsVectorLayer):
-        return ResultadoZoneamentoGeom([], {}, 0.0, {})
+        return ResultadoZoneamentoGeom.vazio()
 
     campo_codigo = detectar_campo_codigo_zona(camada_zoneamento, campo_codigo_zona)
     if campo_codigo is None:
-        return ResultadoZoneamentoGeom([], {}, 0.0, {})
+        return ResultadoZoneamentoGeom.vazio()
 
     idx_codigo = camada_zoneamento.fields().indexFromName(campo_codigo)
     if idx_codigo == -1:
-        return ResultadoZoneamentoGeom([], {}, 0.0, {})
+        return ResultadoZoneamentoGeom.vazio()
+
+    # Filtro pelo retângulo do lote no índice espacial (reaproveitado entre
+    # lotes); só os candidatos são lidos do provedor.
+    indice = obter_indice_espacial(camada_zoneamento)
+    lote_bbox = lote_geom.boundingBox()
+    ids_candidatos = indice.intersects(lote_bbox)
+    if not ids_candidatos:
+        return ResultadoZoneamentoGeom.vazio()
+
+    # Códigos de zona por feição, lidos do provedor uma única vez por
+    # camada; junto com o índice (que guarda as geometrias), as análises
+    # seguintes não voltam ao provedor.
+    codigos = _codigos_por_fid(camada_zoneamento, idx_codigo)
+
+    # Candidatos divididos em blocos processados em paralelo; cada bloco
+    # acumula seu próprio dicionário, somados ao final.
+    blocos = [
+        ids_candidatos[i:i + TAMANHO_BLOCO_ZONEAMENTO]
+        for i in range(0, len(ids_candidatos), TAMANHO_BLOCO_ZONEAMENTO)
+    ]
+
+    def _processar(fids):
+        return _areas_por_zona_bloco(fids, codigos, indice, lote_geom, lote_bbox)
+
+    if len(blocos) == 1:
+        parciais = [_processar(blocos[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(blocos), os.cpu_count() or 1)) as ex:
+            parciais = list(ex.map(_processar, blocos))
 
-    areas_por_zona: Dict[str, float] = {}
+    areas_por_zona: Dict[str, float] = defaultdict(float)
+    for parcial in parciais:
+        for cod, area in parcial.items():
+            areas_por_zona[cod] += area
 
-    for feat in camada_zoneamento.getFeatures():
-        geom_zona = feat.geometry()
-        if geom_zona is None or geom_zona.isEmpty():
-            continue
+    return ResultadoZoneamentoGeom.de_areas(areas_por_zona)
+
+
+# Cache dos códigos de zona: chave (id da camada, nº de feições, índice do campo).
+# Invalidado junto com o índice espacial quando a camada é editada ou removida.
+_CACHE_CODIGOS_ZONA: Dict[Tuple[str, int, int], Dict[int, str]] = registrar_cache_por_camada({})
+
+
+def _codigos_por_fid(camada: QgsVectorLayer, idx_codigo: int) -> Dict[int, str]:
+    """
+    Retorna {fid: código da zona} da camada, lido uma única vez.
 
-        if not geom_zona.intersects(lote_geom):
+    Feições sem código ficam de fora. A leitura pede só o campo de código,
+    sem geometria (as geometrias ficam no índice espacial).
+    """
+    chave = (camada.id(), camada.featureCount(), idx_codigo)
+    codigos = _CACHE_CODIGOS_ZONA.get(chave)
+    if codigos is not None:
+        return codigos
+
+    req = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+    req.setSubsetOfAttributes([idx_codigo])
+
+    codigos = {}
+    for feat in camada.getFeatures(req):
+        bruto = feat.attribute(idx_codigo)
+        if bruto is None or bruto == NULL:
             continue
+        # Muitas feições compartilham o mesmo código: internar a string
+        # evita cópias repetidas e acelera o hash nas somas por zona.
+        cod = sys.intern(bruto.strip()) if isinstance(bruto, str) else str(bruto)
+        if cod:
+            codigos[feat.id()] = cod
+
+    # Descarta entradas antigas da mesma camada antes de guardar a nova
+    for chave_antiga in [c for c in _CACHE_CODIGOS_ZONA if c[0] == chave[0]]:
+        del _CACHE_CODIGOS_ZONA[chave_antiga]
+    monitorar_camada(camada)
+    _CACHE_CODIGOS_ZONA[chave] = codigos
+    return codigos
+
+
+def _areas_por_zona_bloco(
+    fids: List[int],
+    codigos: Dict[int, str],
+    indice,
+    lote_geom: QgsGeometry,
+    lote_bbox,
+) -> Dict[str, float]:
+    """
+    Soma a área de interseção do lote por código de zona para um bloco de
+    feições candidatas.
+
+    Pode rodar fora do thread principal: não acessa a camada (códigos e
+    geometrias já estão em memória) e prepara sua própria cópia do lote,
+    já que o engine preparado não deve ser compartilhado entre threads.
+    """
+    areas_por_zona: Dict[str, float] = defaultdict(float)
 
-        inter = geom_zona.intersection(lote_geom)
-        if inter is None or inter.isEmpty():
+    # Lote preparado uma única vez por bloco: o teste de cada candidata
+    # usa o lado preparado (índice de arestas do GEOS).
+    motor_lote = preparar_geometria(QgsGeometry(lote_geom))
+    area_lote = lote_geom.area()
+
+    for fid in fids:
+        # Código primeiro: feições sem código não precisam de nenhum GEOS
+        cod = codigos.get(fid)
+        if not cod:
             continue
 
-        area_inter = inter.area()
-        if area_inter <= 0:
+        geom_zona = indice.geometry(fid)
+        if geom_zona is None or geom_zona.isEmpty():
             continue
 
-        cod = str(feat[idx_codigo]).strip()
-        if not cod:
+        if not motor_lote.intersects(geom_zona.constGet()):
             continue
 
-        areas_por_zona[cod] = areas_por_zona.get(cod, 0.0) + area_inter
+        # Contenção total dispensa a sobreposição: lote dentro da zona (caso
+        # dominante) → área do lote; zona dentro do lote → área da zona.
+        if motor_lote.within(geom_zona.constGet()):
+            if area_lote > 0:
+                areas_por_zona[cod] += area_lote
+            continue
+        if motor_lote.contains(geom_zona.constGet()):
+            area_zona = geom_zona.area()
+            if area_zona > 0:
+                areas_por_zona[cod] += area_zona
+            continue
 
-    if not areas_por_zona:
-        return ResultadoZoneamentoGeom([], {}, 0.0, {})
+        # Recorte barato pelo retângulo do lote antes da sobreposição exata:
+        # polígonos de zona costumam ter muitos vértices longe do lote.
+        # Se a zona já cabe no retângulo do lote, o recorte não muda nada
+        # e a cópia é evitada.
+        zona_abstrata = geom_zona.constGet()
+        recortada = False
+        if not lote_bbox.contains(geom_zona.boundingBox()):
+            zona_recortada = geom_zona.clipped(lote_bbox)
+            if zona_recortada is not None and not zona_recortada.isEmpty():
+                zona_abstrata = zona_recortada.constGet()
+                recortada = True
+
+        # A sobreposição roda no engine do lote, que já mantém o lote
+        # convertido para GEOS: só a zona é convertida a cada candidata.
+        # Só a área interessa: o resultado (QgsAbstractGeometry) não é
+        # embrulhado em QgsGeometry, e interseção vazia cai em área 0.
+        inter = motor_lote.intersection(zona_abstrata)
+        if inter is None and recortada:
+            # O recorte (Sutherland-Hodgman) pode deixar anéis degenerados
+            # nas bordas do retângulo em zonas côncavas e o GEOS recusar a
+            # sobreposição: refaz com o polígono original da zona.
+            inter = motor_lote.intersection(geom_zona.constGet())
+        if inter is None:
+            log.debug("Interseção lote x zona falhou (fid %s, zona %s); área ignorada", fid, cod)
+            continue
 
-    zonas = sorted(areas_por_zona.keys())
-    area_total = sum(areas_por_zona.values())
+        area_inter = inter.area()
+        if area_inter <= 0:
+            continue
 
-    if area_total <= 0:
-        percentuais = {z: 0.0 for z in zonas}
-    else:
-        percentuais = {z: (areas_por_zona[z] * 100.0 / area_total) for z in zonas}
+        areas_por_zona[cod] += area_inter
 
-    return ResultadoZoneamentoGeom(
-        zonas=zonas,
-        areas_por_zona=areas_por_zona,
-        area_total_zoneada=area_total,
-        percentuais=percentuais,
-    )
+    return areas_por_zona
 
 
 # ----------------------------------------------------------------------
@@ -171,7 +360,7 @@ def _montar_dados_lote_basicos(feature):
     if not feature:
         return None
 
-    field_names = [f.name() for f in feature.fields()]
+    field_names = set(feature.fields().names())
 
     def get_valor(nome_exato):
         if nome_exato in field_names:
@@ -1,34 +1,74 @@
 """Montagem de contexto de relatório a partir da análise de lote."""
 
 import unicodedata
-from typing import Dict, Any, List, Union
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 from ...dominio.motores.motor_analise_lote import ResultadoAnaliseLote
 
 
+@lru_cache(maxsize=512)
 def _normalizar_chave(chave: str) -> str:
     """Remove acentos, converte para minúsculas e remove pontuação comum."""
     chave = unicodedata.normalize('NFKD', chave).encode('ASCII', 'ignore').decode('utf-8')
     return chave.lower().replace(' ', '_').replace('.', '').replace('º', '')
 
 
-def _buscar_valor_flexivel(dados: Dict, chaves_possiveis: List[str]) -> Any:
-    """Procura por várias grafias de uma chave, incluindo versão normalizada."""
-    # Primeiro tenta as chaves exatas
+def _buscar_valor_flexivel(
+    dados: Dict,
+    norm_dados: Optional[Dict[str, Any]],
+    chaves_possiveis: Tuple[str, ...],
+    chaves_norm: Tuple[str, ...],
+) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """
+    Procura por várias grafias de uma chave, incluindo versão normalizada.
+
+    `chaves_norm` são as `chaves_possiveis` já normalizadas (ver
+    _MAPA_IDENTIFICACAO). `norm_dados` é o dicionário `dados` com as chaves
+    normalizadas; pode vir None e só é montado no primeiro erro das chaves
+    exatas. Retorna (valor, norm_dados) para que o chamador o reaproveite
+    nos campos seguintes.
+    """
+    # Primeiro tenta as chaves exatas (caso comum)
     for chave in chaves_possiveis:
         valor = dados.get(chave)
         if valor not in (None, '', ' ', 'null'):
-            return valor
+            return valor, norm_dados
 
-    # Se não achou, tenta normalizar todas as chaves do dicionário e comparar
-    norm_dados = {_normalizar_chave(k): v for k, v in dados.items()}
-    for chave in chaves_possiveis:
-        chave_norm = _normalizar_chave(chave)
+    # Se não achou, compara com as chaves normalizadas do dicionário
+    if norm_dados is None:
+        norm_dados = {_normalizar_chave(k): v for k, v in dados.items()}
+    for chave_norm in chaves_norm:
         if chave_norm in norm_dados:
             valor = norm_dados[chave_norm]
             if valor not in (None, '', ' ', 'null'):
-                return valor
-    return None
+                return valor, norm_dados
+    return None, norm_dados
+
+
+# Campo do relatório -> grafias possíveis na camada de lotes
+_MAPA_CAMPOS_LOTE = (
+    ('id', ('fid', 'id', 'objectid')),
+    ('inscricao_imobiliaria', ('inscr_imob', 'inscricao_imobiliaria', 'inscricao')),
+    ('numero_cadastral', ('nr_cadastr', 'numero_cadastral', 'cadastro')),
+    ('matricula', ('matrícula', 'matricula', 'Matrícula')),
+    ('proprietario', ('propriet.', 'proprietario', 'proprietário', 'propriet', 'Propriet.')),
+    ('bairro', ('bairro', 'Bairro')),
+    ('logradouro', ('logradouro', 'Logradouro', 'rua', 'Rua')),
+    ('numero', ('número', 'numero', 'Número', 'num')),
+    ('loteamento', ('loteamento', 'Loteamento')),
+    ('quadra', ('quadra', 'Quadra')),
+    ('lote', ('lote', 'Lote')),
+    ('status_imovel', ('status', 'Status')),
+    ('observacoes_cadastrais', ('obs', 'Obs', 'observacoes', 'Observações')),
+    ('area_m2', ('area_m2', 'area', 'Area_m2', 'área', 'Área')),
+)
+
+# Mesmo mapa com as grafias já normalizadas (calculado na importação)
+_MAPA_IDENTIFICACAO = tuple(
+    (campo, chaves, tuple(_normalizar_chave(c) for c in chaves))
+    for campo, chaves in _MAPA_CAMPOS_LOTE
+)
 
 
 def _montar_identificacao(dados: Dict[str, Any]) -> Dict[str, Any]:
@@ -36,40 +76,139 @@ def _montar_identificacao(dados: Dict[str, Any]) -> Dict[str, Any]:
     Extrai os dados cadastrais do dicionário de atributos do lote,
     tentando múltiplas grafias comuns para cada campo.
     """
-    mapa = {
-        'id': ['fid', 'id', 'objectid'],
-        'inscricao_imobiliaria': ['inscr_imob', 'inscricao_imobiliaria', 'inscricao'],
-        'numero_cadastral': ['nr_cadastr', 'numero_cadastral', 'cadastro'],
-        'matricula': ['matrícula', 'matricula', 'Matrícula'],
-        'proprietario': ['propriet.', 'proprietario', 'proprietário', 'propriet', 'Propriet.'],
-        'bairro': ['bairro', 'Bairro'],
-        'logradouro': ['logradouro', 'Logradouro', 'rua', 'Rua'],
-        'numero': ['número', 'numero', 'Número', 'num'],
-        'loteamento': ['loteamento', 'Loteamento'],
-        'quadra': ['quadra', 'Quadra'],
-        'lote': ['lote', 'Lote'],
-        'status_imovel': ['status', 'Status'],
-        'observacoes_cadastrais': ['obs', 'Obs', 'observacoes', 'Observações'],
-        'area_m2': ['area_m2', 'area', 'Area_m2', 'área', 'Área'],
-    }
+    # Chaves de `dados` normalizadas: montadas só no primeiro erro das
+    # chaves exatas e reaproveitadas nos demais campos
+    norm_dados = None
 
     resultado = {}
-    for campo_alvo, chaves_possiveis in mapa.items():
-        valor = _buscar_valor_flexivel(dados, chaves_possiveis)
+    for campo_alvo, chaves_possiveis, chaves_norm in _MAPA_IDENTIFICACAO:
+        valor, norm_dados = _buscar_valor_flexivel(
+            dados, norm_dados, chaves_possiveis, chaves_norm
+        )
         resultado[campo_alvo] = valor
 
     # Fallback para área: procura qualquer chave que contenha 'area'
     if resultado['area_m2'] is None:
-        for k, v in dados.items():
-            if 'area' in _normalizar_chave(k):
-                try:
-                    resultado['area_m2'] = float(str(v).replace(',', '.'))
-                    break
-                except:
-                    pass
+        # area_m2 só fica None após a busca normalizada, então norm_dados existe
+        for k, v in norm_dados.items():
+            if 'area' not in k:
+                continue
+            # Valores numéricos (caso comum) convertem direto; só texto
+            # com vírgula decimal passa pelo replace
+            try:
+                resultado['area_m2'] = float(v)
+                break
+            except (TypeError, ValueError):
+                pass
+            try:
+                resultado['area_m2'] = float(str(v).replace(',', '.'))
+                break
+            except (TypeError, ValueError):
+                pass
+    return resultado
+
+
+# ----------------------------------------------------------------------
+# Tabelas de cópia de atributos: (chave no contexto, atributo, padrão).
+# Padrão `list` indica uma lista nova a cada cópia.
+# ----------------------------------------------------------------------
+
+_CAMPOS_ZONEAMENTO = (
+    ("zona", "zona", None),
+    ("macrozona", "macrozona", None),
+    ("eixos", "eixos", None),
+    ("especiais", "especiais", None),
+    ("mensagens", "mensagens", list),
+)
+
+_CAMPOS_ZONA_APLICADA = (
+    ("codigo", "codigo", None),
+    ("tipo", "tipo", None),
+    ("area_m2", "area_m2", 0.0),
+    ("percentual_area", "percentual_area", 0.0),
+    ("notas", "notas", list),
+    ("origem", "origem", None),
+)
+
+_CAMPOS_ZONA_RESOLVIDA = (
+    ("notas_ativas", "notas_ativas", list),
+    ("tipo_regra", "tipo_regra", None),
+    ("resumo", "resumo", ""),
+    ("observacoes", "observacoes", list),
+    ("macrozona", "macrozona", None),
+    ("eixos", "eixos", list),
+    ("especiais", "especiais", list),
+    ("zona_referencia", "zona_principal", None),
+    ("zonas_incidentes", "zonas_incidentes", list),
+)
+
+_CAMPOS_AVALIACAO = (
+    ("zona", "zona", None),
+    ("conforme", "conforme", None),
+    ("pendencias", "pendencias", list),
+    ("observacoes", "observacoes", list),
+)
+
+_CAMPOS_SEGMENTO = (
+    ("id_segmento", "id_segmento", None),
+    ("comprimento_m", "comprimento_m", None),
+    ("logradouro", "logradouro", None),
+    ("tipo_limite", "tipo_limite", None),
+    ("confrontante", "confrontante", None),
+)
+
+_CAMPOS_APP = (
+    ("em_app", "em_app", None),
+    ("em_app_faixa_nuic", "em_app_faixa_nuic", None),
+    ("em_app_manguezal", "em_app_manguezal", None),
+    ("largura_faixa_m", "largura_faixa_m", None),
+    ("tipos_app", "tipos_app", list),
+    ("notas", "notas", list),
+)
+
+_CAMPOS_RISCO = (
+    ("classe_inundacao", "classe_inundacao", None),
+    ("classe_movimento_massa", "classe_movimento_massa", None),
+    ("flags", "flags", list),
+    ("notas", "notas", list),
+)
+
+
+_AUSENTE = object()
+
+
+def _copiar_campos(obj: Any, campos) -> Dict[str, Any]:
+    """
+    Copia atributos de `obj` segundo uma tabela de campos.
+
+    Lê direto do __dict__ do objeto (um único acesso) e só recorre a
+    getattr para o que não estiver lá (properties, slots, objeto None).
+    """
+    atributos = getattr(obj, "__dict__", None) or {}
+    resultado = {}
+    for chave, atributo, padrao in campos:
+        if atributo in atributos:
+            resultado[chave] = atributos[atributo]
+            continue
+        valor = getattr(obj, atributo, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = padrao() if padrao is list else padrao
+        resultado[chave] = valor
     return resultado
 
 
+def _montar_identificacoes(lista_dados: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Monta a identificação de cada lote de uma lista, preservando a ordem.
+
+    O trabalho por lote é Python puro (dicionários e normalização de
+    chaves, já memoizada), então threads não ganham nada com o GIL; e um
+    ProcessPoolExecutor não é viável dentro do QGIS, onde sys.executable é
+    o próprio executável do QGIS. Por isso o processamento é sequencial.
+    """
+    return list(map(_montar_identificacao, lista_dados))
+
+
 def _parametros_para_dict(params: Any) -> Dict[str, Any]:
     """Converte um ParametrosZona em dict simples para uso no relatório."""
     parametros_dict: Dict[str, Any] = {}
@@ -132,32 +271,20 @@ def _processar_faixas_inclinacao(faixas) -> List[Dict[str, Any]]:
     return resultado
 
 
-def construir_contexto_relatorio(
-    dados_lote: Union[Dict[str, Any], List[Dict[str, Any]]],
-    analise: ResultadoAnaliseLote,
-) -> Dict[str, Any]:
-    """Constrói o dicionário de contexto consumido pelo renderizador_html."""
-    ctx: Dict[str, Any] = {}
+def _montar_contexto_analise(analise: ResultadoAnaliseLote) -> Dict[str, Any]:
+    """
+    Monta as seções 2–9 do contexto, que dependem apenas da análise.
 
-    # ------------------------------------------------------------------
-    # 1) Identificação / dados cadastrais
-    # ------------------------------------------------------------------
-    if isinstance(dados_lote, list):
-        ctx["identificacao"] = [_montar_identificacao(d) for d in dados_lote]
-    else:
-        ctx["identificacao"] = _montar_identificacao(dados_lote)
+    Em relatórios com vários lotes a análise é única (gleba unificada), então
+    estas seções são montadas uma só vez, independentemente do nº de lotes.
+    """
+    ctx: Dict[str, Any] = {}
 
     # ------------------------------------------------------------------
     # 2) Zoneamento – interseção geométrica bruta
     # ------------------------------------------------------------------
     zon = analise.zoneamento_intersecao
-    ctx["zoneamento"] = {
-        "zona": getattr(zon, "zona", None),
-        "macrozona": getattr(zon, "macrozona", None),
-        "eixos": getattr(zon, "eixos", None),
-        "especiais": getattr(zon, "especiais", None),
-        "mensagens": getattr(zon, "mensagens", []),
-    }
+    ctx["zoneamento"] = _copiar_campos(zon, _CAMPOS_ZONEAMENTO)
 
     # ------------------------------------------------------------------
     # 3) Zoneamento resolvido (multi-zona)
@@ -166,29 +293,12 @@ def construir_contexto_relatorio(
     if zr is not None:
         zonas_ctx = []
         for za in getattr(zr, "zonas_aplicadas", []) or []:
-            param_dict = _parametros_para_dict(getattr(za, "parametros", None))
-            zonas_ctx.append({
-                "codigo": getattr(za, "codigo", None),
-                "tipo": getattr(za, "tipo", None),
-                "area_m2": getattr(za, "area_m2", 0.0),
-                "percentual_area": getattr(za, "percentual_area", 0.0),
-                "notas": getattr(za, "notas", []),
-                "origem": getattr(za, "origem", None),
-                "parametros": param_dict,
-            })
+            zona_ctx = _copiar_campos(za, _CAMPOS_ZONA_APLICADA)
+            zona_ctx["parametros"] = _parametros_para_dict(getattr(za, "parametros", None))
+            zonas_ctx.append(zona_ctx)
 
-        ctx["zoneamento_resolvido"] = {
-            "zonas": zonas_ctx,
-            "notas_ativas": getattr(zr, "notas_ativas", []),
-            "tipo_regra": getattr(zr, "tipo_regra", None),
-            "resumo": getattr(zr, "resumo", ""),
-            "observacoes": getattr(zr, "observacoes", []),
-            "macrozona": getattr(zr, "macrozona", None),
-            "eixos": getattr(zr, "eixos", []),
-            "especiais": getattr(zr, "especiais", []),
-            "zona_referencia": getattr(zr, "zona_principal", None),
-            "zonas_incidentes": getattr(zr, "zonas_incidentes", []),
-        }
+        ctx["zoneamento_resolvido"] = {"zonas": zonas_ctx}
+        ctx["zoneamento_resolvido"].update(_copiar_campos(zr, _CAMPOS_ZONA_RESOLVIDA))
     else:
         ctx["zoneamento_resolvido"] = {
             "zonas": [], "notas_ativas": [], "tipo_regra": None,
@@ -204,13 +314,8 @@ def construir_contexto_relatorio(
         av = analise.zoneamento_avaliacao
         params = getattr(av, "parametros", None)
         parametros_dict = _parametros_para_dict(params)
-        ctx["indices"] = {
-            "zona": getattr(av, "zona", None),
-            "conforme": getattr(av, "conforme", None),
-            "pendencias": getattr(av, "pendencias", []),
-            "observacoes": getattr(av, "observacoes", []),
-            "parametros": parametros_dict,
-        }
+        ctx["indices"] = _copiar_campos(av, _CAMPOS_AVALIACAO)
+        ctx["indices"]["parametros"] = parametros_dict
     else:
         ctx["indices"] = {
             "zona": None, "conforme": None,
@@ -227,14 +332,7 @@ def construir_contexto_relatorio(
             ctx["confrontantes_por_proprietario"] = getattr(testadas, "confrontantes_por_proprietario", {}) or {}
             segmentos = getattr(testadas, "segmentos", []) or []
             ctx["segmentos_limites"] = [
-                {
-                    "id_segmento": getattr(s, "id_segmento", None),
-                    "comprimento_m": getattr(s, "comprimento_m", None),
-                    "logradouro": getattr(s, "logradouro", None),
-                    "tipo_limite": getattr(s, "tipo_limite", None),
-                    "confrontante": getattr(s, "confrontante", None),
-                }
-                for s in segmentos
+                _copiar_campos(s, _CAMPOS_SEGMENTO) for s in segmentos
             ]
             ctx["testada_principal"] = (
                 max(ctx["testadas_por_logradouro"].items(), key=lambda kv: kv[1])[0]
@@ -255,25 +353,13 @@ def construir_contexto_relatorio(
     # 6) APP
     # ------------------------------------------------------------------
     app = analise.app
-    ctx["ambiente"] = {
-        "em_app": getattr(app, "em_app", None),
-        "em_app_faixa_nuic": getattr(app, "em_app_faixa_nuic", None),
-        "em_app_manguezal": getattr(app, "em_app_manguezal", None),
-        "largura_faixa_m": getattr(app, "largura_faixa_m", None),
-        "tipos_app": getattr(app, "tipos_app", []),
-        "notas": getattr(app, "notas", []),
-    }
+    ctx["ambiente"] = _copiar_campos(app, _CAMPOS_APP)
 
     # ------------------------------------------------------------------
     # 7) Risco
     # ------------------------------------------------------------------
     risco = analise.risco
-    ctx["risco"] = {
-        "classe_inundacao": getattr(risco, "classe_inundacao", None),
-        "classe_movimento_massa": getattr(risco, "classe_movimento_massa", None),
-        "flags": getattr(risco, "flags", []),
-        "notas": getattr(risco, "notas", []),
-    }
+    ctx["risco"] = _copiar_campos(risco, _CAMPOS_RISCO)
 
     # ------------------------------------------------------------------
     # 8) Inclinação do terreno
@@ -327,6 +413,24 @@ def construir_contexto_relatorio(
     return ctx
 
 
+def construir_contexto_relatorio(
+    dados_lote: Union[Dict[str, Any], List[Dict[str, Any]]],
+    analise: ResultadoAnaliseLote,
+) -> Dict[str, Any]:
+    """Constrói o dicionário de contexto consumido pelo renderizador_html."""
+    # ------------------------------------------------------------------
+    # 1) Identificação / dados cadastrais (uma entrada por lote)
+    # ------------------------------------------------------------------
+    if isinstance(dados_lote, list):
+        identificacao = _montar_identificacoes(dados_lote)
+    else:
+        identificacao = _montar_identificacao(dados_lote)
+
+    ctx: Dict[str, Any] = {"identificacao": identificacao}
+    ctx.update(_montar_contexto_analise(analise))
+    return ctx
+
+
 class ConstrutorRelatorio:
     """Fachada simples para construção de relatórios."""
     def __init__(self):
@@ -1,15 +1,25 @@
 """Renderização HTML baseada em template para o relatório Zôni v2."""
 
 import os
+import re
+import html
 import json
+import time
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, Any, List, Union
-from datetime import datetime
+
+
+# Tokens do template: placeholder {CHAVE}, marcadores {if ...}/{endif} e
+# chaves literais (CSS/JS) a escapar para str.format.
+_RE_TOKEN_TEMPLATE = re.compile(r"\{[A-Z_]+\}|\{if |\{endif\}|[{}]")
+_TOKENS_FIXOS = {"{if ": "<!-- if ", "{endif}": "-->", "{": "{{", "}": "}}"}
 
 
 def _esc(valor: Any) -> str:
     if valor is None:
         return "-"
-    return str(valor)
+    return html.escape(str(valor), quote=False)
 
 
 def _format_float(value: Any, decimals: int = 2) -> str:
@@ -25,21 +35,91 @@ def _format_float(value: Any, decimals: int = 2) -> str:
         return _esc(value)
 
 
+class _Placeholders(dict):
+    """Mapeamento para format_map: chaves desconhecidas voltam como {CHAVE}."""
+
+    def __missing__(self, chave):
+        return "{" + chave + "}"
+
+
+def _ff2(value: Any) -> str:
+    """Atalho de _format_float(value) para valores já numéricos (tabelas)."""
+    if value is None:
+        return "-"
+    if type(value) is float or type(value) is int:
+        return f"{value:.2f}"
+    return _format_float(value)
+
+
+def _ff1(value: Any) -> str:
+    """Atalho de _format_float(value, decimals=1) para valores já numéricos."""
+    if value is None:
+        return "-"
+    if type(value) is float or type(value) is int:
+        return f"{value:.1f}"
+    return _format_float(value, decimals=1)
+
+
+@lru_cache(maxsize=4)
+def _compilar_template(template: str) -> str:
+    """
+    Converte o template em string de formato para `str.format_map`.
+
+    Mantém os placeholders {CHAVE}, escapa as demais chaves (CSS/JS) e já
+    aplica a troca de {if ...}/{endif} por comentários HTML. Feito uma vez
+    por template; a substituição passa a ser uma única passada em C.
+    """
+    def _token(m):
+        token = m.group(0)
+        return _TOKENS_FIXOS.get(token, token)
+
+    return _RE_TOKEN_TEMPLATE.sub(_token, template)
+
+
+@lru_cache(maxsize=1)
 def _carregar_template_html() -> str:
+    """
+    Lê o template do relatório uma única vez por sessão.
+
+    O arquivo não muda enquanto o plugin está carregado; para forçar a
+    releitura (ex.: ao editar o template), use
+    `_carregar_template_html.cache_clear()`.
+    """
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    template_path = os.path.join(base_dir, "modelos", "relatorio_completo.html")
-    if not os.path.exists(template_path):
-        template_path = os.path.join(base_dir, "relatorio_completo.html")
-    try:
-        with open(template_path, "r", encoding="utf-8") as f:
-            return f.read()
-    except OSError:
-        return (
-            "<html><body>"
-            "<h1>Relatório Zôni v2</h1>"
-            "<p>Template não encontrado.</p>"
-            "</body></html>"
-        )
+    for template_path in (
+        os.path.join(base_dir, "modelos", "relatorio_completo.html"),
+        os.path.join(base_dir, "relatorio_completo.html"),
+    ):
+        try:
+            with open(template_path, "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            continue
+        except OSError:
+            break
+    return (
+        "<html><body>"
+        "<h1>Relatório Zôni v2</h1>"
+        "<p>Template não encontrado.</p>"
+        "</body></html>"
+    )
+
+
+# Campos cadastrais exibidos na tabela de identificação: (chave, rótulo)
+_CAMPOS_CADASTRAIS = (
+    ("proprietario", "Proprietário(s)"),
+    ("inscricao_imobiliaria", "Inscrição(ões) imobiliária(s)"),
+    ("numero_cadastral", "Número(s) cadastral(is)"),
+    ("matricula", "Matrícula(s)"),
+    ("bairro", "Bairro(s)"),
+    ("logradouro", "Logradouro(s)"),
+    ("numero", "Número(s)"),
+    ("loteamento", "Loteamento(s)"),
+    ("quadra", "Quadra(s)"),
+    ("lote", "Lote(s)"),
+    ("status_imovel", "Status do(s) imóvel(is)"),
+    ("observacoes_cadastrais", "Observações cadastrais"),
+)
 
 
 #def _agregar_dados_cadastrais(
@@ -69,44 +149,20 @@ def _agregar_dados_cadastrais(ident, area_total_override=None):
 
     n_lotes = len(ident_list)
 
-#    def collect(key: str) -> List[str]:
-    def collect(key):
-        vals = []
-        for i in ident_list:
-            v = i.get(key)
+    # Uma única passada sobre os lotes: valores únicos por campo (dict como
+    # conjunto ordenado) e soma das áreas
+    valores_por_campo = {chave: {} for chave, _ in _CAMPOS_CADASTRAIS}
+    somar_area = area_total_override is None
+    area_total = 0.0
+    tem_area = not somar_area
+    for i in ident_list:
+        i_get = i.get
+        for chave, valores in valores_por_campo.items():
+            v = i_get(chave)
             if v not in (None, "", " "):
-                vals.append(str(v))
-        seen = set()
-        uniq = []
-        for v in vals:
-            if v not in seen:
-                seen.add(v)
-                uniq.append(v)
-        return uniq
-
-    # Coleta todos os campos cadastrais
-    proprietarios = collect("proprietario")
-    inscricoes = collect("inscricao_imobiliaria")
-    numeros_cadastrais = collect("numero_cadastral")
-    matriculas = collect("matricula")
-    bairros = collect("bairro")
-    logradouros = collect("logradouro")
-    numeros = collect("numero")
-    loteamentos = collect("loteamento")
-    quadras = collect("quadra")
-    lotes = collect("lote")
-    status = collect("status_imovel")
-    observacoes = collect("observacoes_cadastrais")
-
-    # Área total
-    if area_total_override is not None:
-        area_total = area_total_override
-        tem_area = True
-    else:
-        area_total = 0.0
-        tem_area = False
-        for i in ident_list:
-            v = i.get("area_m2")
+                valores[str(v)] = None
+        if somar_area:
+            v = i_get("area_m2")
             if v in (None, "", " "):
                 continue
             tem_area = True
@@ -114,27 +170,15 @@ def _agregar_dados_cadastrais(ident, area_total_override=None):
                 area_total += float(v)
             except Exception:
                 pass
+    if not somar_area:
+        area_total = area_total_override
 
     linhas = []
-
-#    def add_row(label: str, valores: List[str]):
-    def add_row(label, valores):
+    for chave, label in _CAMPOS_CADASTRAIS:
+        valores = valores_por_campo[chave]
         texto = ", ".join(valores) if valores else "-"
         linhas.append(f"<tr><th>{_esc(label)}</th><td>{_esc(texto)}</td></tr>")
 
-    add_row("Proprietário(s)", proprietarios)
-    add_row("Inscrição(ões) imobiliária(s)", inscricoes)
-    add_row("Número(s) cadastral(is)", numeros_cadastrais)
-    add_row("Matrícula(s)", matriculas)
-    add_row("Bairro(s)", bairros)
-    add_row("Logradouro(s)", logradouros)
-    add_row("Número(s)", numeros)
-    add_row("Loteamento(s)", loteamentos)
-    add_row("Quadra(s)", quadras)
-    add_row("Lote(s)", lotes)
-    add_row("Status do(s) imóvel(is)", status)
-    add_row("Observações cadastrais", observacoes)
-
     if tem_area:
         linhas.append(
             "<tr><th>Área total do(s) lote(s) (m²)</th>"
@@ -202,6 +246,41 @@ def _montar_tabela_testadas(contexto: Dict[str, Any]) -> (str, str):
     return "\n".join(linhas), n_testadas
 
 
+# Fragmentos fixos das tabelas, montados uma vez no carregamento do módulo
+_CABECALHO_ZONAS = "<tr><th>Zona</th><th>Área (m²)</th><th>Percentual (%)</th></tr>"
+_CABECALHO_ZONAS_MULTI = (
+    "<tr><th>Zona</th><th>Área (m²)</th><th>Percentual (%)</th>"
+    "<th>CA mín.</th><th>CA básico</th><th>CA máx.</th>"
+    "<th>TPS</th><th>TOS</th><th>Pav. básico</th><th>Pav. máx.</th>"
+    "<th>Gab. básico (m)</th><th>Gab. máx. (m)</th></tr>"
+)
+_CELULA_COR_INCLINACAO = '<div class="inclinacao-cor" style="background-color:{};"></div>'
+_LINHA_TOTAL_APP_INCLINACAO = (
+    "<tr style='background-color:#f9f9f9;font-weight:bold;'>"
+    "<td colspan='2' style='text-align:right;'>Área total APP por inclinação (>45°):</td>"
+    "<td>{}</td><td>{}%</td>"
+    "<td><span class='app-flag'>APP</span></td></tr>"
+)
+
+# Colunas de parâmetros na tabela multi-zona: (chave em 'parametros', formatador)
+_COLUNAS_PARAMETROS_ZONA = (
+    ("CA_min", _ff2),
+    ("CA_bas", _ff2),
+    ("CA_max", _ff2),
+    ("Tperm", _ff2),
+    ("Tocup", _ff2),
+    ("Npav_bas", _esc),
+    ("Npav_max", _esc),
+    ("Gab_bas", _ff2),
+    ("Gab_max", _ff2),
+)
+
+
+def _linha_tabela(celulas) -> str:
+    """Monta uma linha <tr> com um único join sobre as células já formatadas."""
+    return "<tr><td>" + "</td><td>".join(celulas) + "</td></tr>"
+
+
 def _montar_tabela_zonas(contexto: Dict[str, Any], area_total: Any) -> (str, str, str):
     """Monta HTML da tabela de zonas e retorna (html, zona_principal, justificativa)."""
     zr = contexto.get("zoneamento_resolvido") or {}
@@ -211,39 +290,22 @@ def _montar_tabela_zonas(contexto: Dict[str, Any], area_total: Any) -> (str, str
         linhas = []
         multi = len(zonas_res) > 1
 
-        if multi:
-            linhas.append(
-                "<tr><th>Zona</th><th>Área (m²)</th><th>Percentual (%)</th>"
-                "<th>CA mín.</th><th>CA básico</th><th>CA máx.</th>"
-                "<th>TPS</th><th>TOS</th><th>Pav. básico</th><th>Pav. máx.</th>"
-                "<th>Gab. básico (m)</th><th>Gab. máx. (m)</th></tr>"
-            )
-        else:
-            linhas.append("<tr><th>Zona</th><th>Área (m²)</th><th>Percentual (%)</th></tr>")
+        linhas.append(_CABECALHO_ZONAS_MULTI if multi else _CABECALHO_ZONAS)
 
         for z in zonas_res:
             codigo = z.get("codigo")
             tipo = z.get("tipo")
             cod_fmt = _esc(codigo) + (f" ({_esc(tipo)})" if tipo else "")
-            area = _format_float(z.get("area_m2"))
-            perc = _format_float(z.get("percentual_area"), decimals=1)
+            area = _ff2(z.get("area_m2"))
+            perc = _ff1(z.get("percentual_area"))
 
             if multi:
                 param = z.get("parametros") or {}
-                linhas.append(
-                    f"<tr><td>{cod_fmt}</td><td>{area}</td><td>{perc}</td>"
-                    f"<td>{_format_float(param.get('CA_min'))}</td>"
-                    f"<td>{_format_float(param.get('CA_bas'))}</td>"
-                    f"<td>{_format_float(param.get('CA_max'))}</td>"
-                    f"<td>{_format_float(param.get('Tperm'))}</td>"
-                    f"<td>{_format_float(param.get('Tocup'))}</td>"
-                    f"<td>{_esc(param.get('Npav_bas'))}</td>"
-                    f"<td>{_esc(param.get('Npav_max'))}</td>"
-                    f"<td>{_format_float(param.get('Gab_bas'))}</td>"
-                    f"<td>{_format_float(param.get('Gab_max'))}</td></tr>"
-                )
+                celulas = [cod_fmt, area, perc]
+                celulas.extend(fmt(param.get(chave)) for chave, fmt in _COLUNAS_PARAMETROS_ZONA)
             else:
-                linhas.append(f"<tr><td>{cod_fmt}</td><td>{area}</td><td>{perc}</td></tr>")
+                celulas = (cod_fmt, area, perc)
+            linhas.append(_linha_tabela(celulas))
 
         zona_principal = zr.get("zona_referencia") or "-"
         resumo = zr.get("resumo") or ""
@@ -264,7 +326,7 @@ def _montar_tabela_zonas(contexto: Dict[str, Any], area_total: Any) -> (str, str
         area_str = "-"
         perc_str = "-"
 
-    linhas_fallback = ["<tr><th>Zona</th><th>Área (m²)</th><th>Percentual (%)</th></tr>"]
+    linhas_fallback = [_CABECALHO_ZONAS]
     if zona:
         linhas_fallback.append(f"<tr><td>{_esc(zona)}</td><td>{area_str}</td><td>{perc_str}</td></tr>")
         zona_principal = _esc(zona)
@@ -278,114 +340,168 @@ def _montar_tabela_zonas(contexto: Dict[str, Any], area_total: Any) -> (str, str
     return "\n".join(linhas_fallback), zona_principal, justificativa
 
 
+_CHAVES_PARAMETROS_URB = (
+    "CA_MIN", "CA_BAS", "CA_MAX_AJ", "TPS", "TOS",
+    "RF", "RFU", "RL", "NP_BAS", "NP_MAX_AJ", "HEMB", "VAGAS",
+)
+
+
 def _montar_parametros_urbanisticos(contexto: Dict[str, Any]) -> Dict[str, str]:
     """Extrai parâmetros urbanísticos da chave 'indices'."""
     indices = contexto.get("indices")
     if not indices:
-        return {k: "-" for k in ["CA_MIN", "CA_BAS", "CA_MAX_AJ", "TPS", "TOS",
-                                  "RF", "RFU", "RL", "NP_BAS", "NP_MAX_AJ", "HEMB", "VAGAS"]}
+        return dict.fromkeys(_CHAVES_PARAMETROS_URB, "-")
 
-    param = indices.get("parametros", {}) or {}
-    extras = param.get("extras") or {}
+    param = indices.get("parametros") or {}
+    param_get = param.get
+    extras_get = (param_get("extras") or {}).get
 
     return {
-        "CA_MIN": _format_float(param.get("CA_min")),
-        "CA_BAS": _format_float(param.get("CA_bas")),
-        "CA_MAX_AJ": _format_float(param.get("CA_max")),
-        "TPS": _format_float(param.get("Tperm")),
-        "TOS": _format_float(param.get("Tocup")),
-        "RF": _esc(extras.get("RF")),
-        "RFU": _esc(extras.get("RFU")),
-        "RL": _esc(extras.get("RL") or extras.get("RLF")),
-        "NP_BAS": _esc(param.get("Npav_bas")),
-        "NP_MAX_AJ": _esc(param.get("Npav_max")),
-        "HEMB": _esc(extras.get("HEMB") or extras.get("AEMax")),
-        "VAGAS": _esc(extras.get("vagas_min") or extras.get("vagas")),
+        "CA_MIN": _format_float(param_get("CA_min")),
+        "CA_BAS": _format_float(param_get("CA_bas")),
+        "CA_MAX_AJ": _format_float(param_get("CA_max")),
+        "TPS": _format_float(param_get("Tperm")),
+        "TOS": _format_float(param_get("Tocup")),
+        "RF": _esc(extras_get("RF")),
+        "RFU": _esc(extras_get("RFU")),
+        "RL": _esc(extras_get("RL") or extras_get("RLF")),
+        "NP_BAS": _esc(param_get("Npav_bas")),
+        "NP_MAX_AJ": _esc(param_get("Npav_max")),
+        "HEMB": _esc(extras_get("HEMB") or extras_get("AEMax")),
+        "VAGAS": _esc(extras_get("vagas_min") or extras_get("vagas")),
     }
 
 
+# Status/classe CSS/observação de APP indexados por bool (False, True)
+_APP_FAIXA_STATUS = (
+    ("Não identificada", "status-ausente", "Sem APP de faixa de curso d'água identificada."),
+    ("Presente", "status-presente", "Área de APP em faixa de curso d'água."),
+)
+_APP_MANGUE_STATUS = (
+    ("Não identificado", "status-ausente", "Sem APP de manguezal identificada."),
+    ("Presente", "status-presente", "Área de APP de manguezal identificada."),
+)
+
+
 def _montar_dados_app(contexto: Dict[str, Any]) -> Dict[str, str]:
     """Extrai dados de APP do contexto."""
-    ambiente = contexto.get("ambiente", {})
-    em_app_faixa = ambiente.get("em_app_faixa_nuic", False)
-    em_app_mangue = ambiente.get("em_app_manguezal", False)
-    largura = ambiente.get("largura_faixa_m")
-    notas = ambiente.get("notas", [])
+    ambiente = contexto.get("ambiente") or {}
+    ambiente_get = ambiente.get
+    em_app_faixa = ambiente_get("em_app_faixa_nuic", False)
+    em_app_mangue = ambiente_get("em_app_manguezal", False)
+    largura = ambiente_get("largura_faixa_m")
+    notas = ambiente_get("notas") or []
+
+    faixa_status, faixa_classe, faixa_obs = _APP_FAIXA_STATUS[bool(em_app_faixa)]
+    mangue_status, mangue_classe, mangue_obs = _APP_MANGUE_STATUS[bool(em_app_mangue)]
+    if em_app_faixa and notas:
+        faixa_obs = faixa_obs + " " + "; ".join(notas[:2])
+    if em_app_mangue and len(notas) > 2:
+        mangue_obs = mangue_obs + " " + "; ".join(notas[2:4])
 
     return {
-        "APP_FAIXA_STATUS": "Presente" if em_app_faixa else "Não identificada",
-        "APP_FAIXA_CLASSE": "status-presente" if em_app_faixa else "status-ausente",
+        "APP_FAIXA_STATUS": faixa_status,
+        "APP_FAIXA_CLASSE": faixa_classe,
         "APP_FAIXA_LARGURA": f"{_format_float(largura)} m" if largura else "-",
-        "APP_FAIXA_OBS": ("Área de APP em faixa de curso d'água." + (" " + "; ".join(notas[:2]) if notas else ""))
-                         if em_app_faixa else "Sem APP de faixa de curso d'água identificada.",
-        "APP_MANGUE_STATUS": "Presente" if em_app_mangue else "Não identificado",
-        "APP_MANGUE_CLASSE": "status-presente" if em_app_mangue else "status-ausente",
-        "APP_MANGUE_OBS": ("Área de APP de manguezal identificada." + (" " + "; ".join(notas[2:4]) if len(notas) > 2 else ""))
-                          if em_app_mangue else "Sem APP de manguezal identificada.",
+        "APP_FAIXA_OBS": faixa_obs,
+        "APP_MANGUE_STATUS": mangue_status,
+        "APP_MANGUE_CLASSE": mangue_classe,
+        "APP_MANGUE_OBS": mangue_obs,
     }
 
 
+# Níveis de risco, na ordem de prioridade da classificação: (grau, classe CSS, padrão).
+# MUITO BAIXA vem primeiro; do contrário "MUITO BAIXA" casaria antes com BAIXA.
+_NIVEIS_RISCO = (
+    ("MUITO BAIXA", "status-presente", re.compile(r"MUITO BAIXA|\bMB\b|^1$")),
+    ("ALTA", "status-alerta", re.compile(r"ALTA|ALTO|^(?:A|4)$")),
+    ("MÉDIA", "status-alerta", re.compile(r"MÉDIA|MEDIA|^(?:M|3)$")),
+    ("BAIXA", "status-presente", re.compile(r"BAIXA|BAIXO|^(?:B|2)$")),
+)
+
+# Recomendações por nível: (padrão, recomendação inundação, recomendação movimento de massa)
+_RECOMENDACOES_RISCO = (
+    (
+        re.compile(r"ALTA"),
+        "Requer Estudo Hidrológico e Hidráulico (EHH) detalhado. Considerar elevação do nível de piso.",
+        "Requer Estudo Geotécnico completo e projeto de contenção. Monitoramento obrigatório.",
+    ),
+    (
+        re.compile(r"MÉDIA|MEDIA"),
+        "Recomenda-se análise hidrológica preliminar. Dimensionar drenagem para evento de 50 anos.",
+        "Recomenda-se investigação geotécnica preliminar. Avaliar inclinação e tipo de solo.",
+    ),
+    (
+        re.compile(r"BAIXA|BAIXO"),
+        "Sistema de drenagem convencional geralmente adequado.",
+        "Procedimentos geotécnicos padrão geralmente suficientes.",
+    ),
+)
+
+_RISCO_NAO_INFORMADO = ("Não informada", "None", "null")
+
+
+@dataclass(frozen=True)
+class _ClassificacaoRisco:
+    grau: str
+    cor: str
+    recomendacao_inundacao: str
+    recomendacao_movimento: str
+
+
+_CLASSIFICACAO_SEM_DADOS = _ClassificacaoRisco(
+    "Não classificado",
+    "status-ausente",
+    "Sem informações suficientes para recomendações específicas.",
+    "Sem informações suficientes para recomendações específicas.",
+)
+
+
+@lru_cache(maxsize=64)
+def _classificar_risco_texto(s: str) -> _ClassificacaoRisco:
+    grau, cor = s, "status-ausente"
+    for nivel, classe_css, padrao in _NIVEIS_RISCO:
+        if padrao.search(s):
+            grau, cor = nivel, classe_css
+            break
+
+    recom_inund = recom_mov = "Sem recomendações específicas."
+    for padrao, texto_inund, texto_mov in _RECOMENDACOES_RISCO:
+        if padrao.search(s):
+            recom_inund, recom_mov = texto_inund, texto_mov
+            break
+
+    return _ClassificacaoRisco(grau, cor, recom_inund, recom_mov)
+
+
+def _classificar_risco(classe: Any) -> _ClassificacaoRisco:
+    """Classifica uma classe de risco (grau, cor e recomendações) de uma só vez."""
+    if not classe or classe in _RISCO_NAO_INFORMADO:
+        return _CLASSIFICACAO_SEM_DADOS
+    return _classificar_risco_texto(str(classe).upper())
+
+
 def _montar_dados_risco(contexto: Dict[str, Any]) -> Dict[str, str]:
     """Extrai dados de Risco do contexto."""
-    risco = contexto.get("risco", {})
+    risco = contexto.get("risco") or {}
     classe_inund = risco.get("classe_inundacao", "Não informada")
     classe_mov = risco.get("classe_movimento_massa", "Não informada")
 
-    def classificar(classe):
-        if not classe or classe in ["Não informada", "None", "null"]:
-            return ("Não classificado", "status-ausente")
-        s = str(classe).upper()
-        if "ALTA" in s or "ALTO" in s or s in ("A", "4"):
-            return ("ALTA", "status-alerta")
-        if "MÉDIA" in s or "MEDIA" in s or s in ("M", "3"):
-            return ("MÉDIA", "status-alerta")
-        if "BAIXA" in s or "BAIXO" in s or s in ("B", "2"):
-            return ("BAIXA", "status-presente")
-        if "MUITO BAIXA" in s or "MB" in s or s == "1":
-            return ("MUITO BAIXA", "status-presente")
-        return (s, "status-ausente")
-
-    grau_inund, cor_inund = classificar(classe_inund)
-    grau_mov, cor_mov = classificar(classe_mov)
+    inund = _classificar_risco(classe_inund)
+    mov = _classificar_risco(classe_mov)
 
     return {
         "RISCO_INUND_CLASSE": _esc(classe_inund),
-        "RISCO_INUND_GRAU": grau_inund,
-        "RISCO_INUND_COR": cor_inund,
-        "RISCO_INUND_RECOM": _obter_recomendacao_inundacao(classe_inund),
+        "RISCO_INUND_GRAU": inund.grau,
+        "RISCO_INUND_COR": inund.cor,
+        "RISCO_INUND_RECOM": inund.recomendacao_inundacao,
         "RISCO_MOV_CLASSE": _esc(classe_mov),
-        "RISCO_MOV_GRAU": grau_mov,
-        "RISCO_MOV_COR": cor_mov,
-        "RISCO_MOV_RECOM": _obter_recomendacao_movimento(classe_mov),
+        "RISCO_MOV_GRAU": mov.grau,
+        "RISCO_MOV_COR": mov.cor,
+        "RISCO_MOV_RECOM": mov.recomendacao_movimento,
     }
 
 
-def _obter_recomendacao_inundacao(classe: str) -> str:
-    if not classe or classe in ["Não informada", "None", "null"]:
-        return "Sem informações suficientes para recomendações específicas."
-    s = str(classe).upper()
-    if "ALTA" in s:
-        return "Requer Estudo Hidrológico e Hidráulico (EHH) detalhado. Considerar elevação do nível de piso."
-    if "MÉDIA" in s or "MEDIA" in s:
-        return "Recomenda-se análise hidrológica preliminar. Dimensionar drenagem para evento de 50 anos."
-    if "BAIXA" in s or "BAIXO" in s:
-        return "Sistema de drenagem convencional geralmente adequado."
-    return "Sem recomendações específicas."
-
-
-def _obter_recomendacao_movimento(classe: str) -> str:
-    if not classe or classe in ["Não informada", "None", "null"]:
-        return "Sem informações suficientes para recomendações específicas."
-    s = str(classe).upper()
-    if "ALTA" in s:
-        return "Requer Estudo Geotécnico completo e projeto de contenção. Monitoramento obrigatório."
-    if "MÉDIA" in s or "MEDIA" in s:
-        return "Recomenda-se investigação geotécnica preliminar. Avaliar inclinação e tipo de solo."
-    if "BAIXA" in s or "BAIXO" in s:
-        return "Procedimentos geotécnicos padrão geralmente suficientes."
-    return "Sem recomendações específicas."
-
-
 def _montar_tabela_inclinacao(contexto: Dict[str, Any]) -> str:
     """Monta HTML da tabela de inclinação do terreno."""
     inclinacao = contexto.get("inclinacao", {})
@@ -405,26 +521,30 @@ def _montar_tabela_inclinacao(contexto: Dict[str, Any]) -> str:
         percentual = faixa.get("percentual", 0.0)
         app = faixa.get("app", False)
         app_flag = '<span class="app-flag">APP</span>' if app else ''
-        cor_cell = f'<div class="inclinacao-cor" style="background-color:{cor};"></div>'
-        linhas.append(
-            f"<tr><td>{_esc(faixa_desc)}</td><td>{cor_cell}</td>"
-            f"<td>{_format_float(area_m2)}</td><td>{_format_float(percentual, decimals=2)}%</td>"
-            f"<td>{app_flag}</td></tr>"
-        )
+        cor_cell = _CELULA_COR_INCLINACAO.format(cor)
+        linhas.append(_linha_tabela((
+            _esc(faixa_desc), cor_cell, _ff2(area_m2), _ff2(percentual) + "%", app_flag,
+        )))
 
     area_app = inclinacao.get("area_app_inclinacao_m2", 0.0)
     perc_app = inclinacao.get("percentual_app_inclinacao", 0.0)
     if inclinacao.get("tem_app_por_inclinacao", False) and area_app > 0:
-        linhas.append(
-            f"<tr style='background-color:#f9f9f9;font-weight:bold;'>"
-            f"<td colspan='2' style='text-align:right;'>Área total APP por inclinação (>45°):</td>"
-            f"<td>{_format_float(area_app)}</td><td>{_format_float(perc_app, decimals=2)}%</td>"
-            f"<td><span class='app-flag'>APP</span></td></tr>"
-        )
+        linhas.append(_LINHA_TOTAL_APP_INCLINACAO.format(_ff2(area_app), _ff2(perc_app)))
 
     return "\n".join(linhas)
 
 
+# Termos (substrings, em minúsculas) usados na classificação das notas, na
+# ordem de prioridade: anexo > condicionante > restrição.
+_TERMOS_NOTA_ANEXO = ("nota", "anexo iii", "anexo 3", "zeot2", "muq3", "10", "37")
+_TERMOS_NOTA_CONDICIONANTE = ("condicionante", "recomenda", "sugere", "aconselha", "observa")
+_TERMOS_NOTA_RESTRICAO = ("restri", "proibi", "impede", "penden", "problema", "erro", "falta", "inviá")
+
+_RE_NOTA_ANEXO = re.compile("|".join(map(re.escape, _TERMOS_NOTA_ANEXO)))
+_RE_NOTA_CONDICIONANTE = re.compile("|".join(map(re.escape, _TERMOS_NOTA_CONDICIONANTE)))
+_RE_NOTA_RESTRICAO = re.compile("|".join(map(re.escape, _TERMOS_NOTA_RESTRICAO)))
+
+
 def _montar_listas_notas_separadas(contexto: Dict[str, Any]) -> Dict[str, str]:
     """Compila notas/condicionantes separadas por categoria."""
     todas = []
@@ -462,22 +582,17 @@ def _montar_listas_notas_separadas(contexto: Dict[str, Any]) -> Dict[str, str]:
             todas.append(f"APP por inclinação do terreno (>45°): {_format_float(area)} m² ({_format_float(perc, decimals=2)}% da área).")
 
     # Remove duplicados
-    unicas = []
-    vistas = set()
-    for n in todas:
-        if n and n not in vistas:
-            vistas.add(n)
-            unicas.append(n)
+    unicas = list(dict.fromkeys(n for n in todas if n))
 
     # Classificação
     anexo, cond, restr = [], [], []
     for n in unicas:
         nl = str(n).lower()
-        if any(p in nl for p in ["nota", "anexo iii", "anexo 3", "zeot2", "muq3", "10", "37"]):
+        if _RE_NOTA_ANEXO.search(nl):
             anexo.append(n)
-        elif any(p in nl for p in ["condicionante", "recomenda", "sugere", "aconselha", "observa"]):
+        elif _RE_NOTA_CONDICIONANTE.search(nl):
             cond.append(n)
-        elif any(p in nl for p in ["restri", "proibi", "impede", "penden", "problema", "erro", "falta", "inviá"]):
+        elif _RE_NOTA_RESTRICAO.search(nl):
             restr.append(n)
         else:
             cond.append(n)
@@ -495,10 +610,30 @@ def _montar_listas_notas_separadas(contexto: Dict[str, Any]) -> Dict[str, str]:
     }
 
 
-def gerar_html_basico(contexto: Dict[str, Any]) -> str:
-    """Gera o HTML final do relatório a partir do contexto."""
-    template = _carregar_template_html()
+def _debug_ctx_ativo() -> bool:
+    return os.environ.get("ZONI_DEBUG_CTX", "").strip().lower() not in ("", "0", "false", "nao", "não")
+
+
+def _montar_debug_ctx(contexto: Dict[str, Any]) -> str:
+    """
+    Serializa o contexto para a seção DEBUG do relatório.
 
+    A serialização completa é cara em contextos grandes (glebas com muitos
+    lotes/segmentos), por isso só é feita com a variável de ambiente
+    ZONI_DEBUG_CTX ativada (ex.: ZONI_DEBUG_CTX=1). Desativada, retorna ""
+    e a seção fica vazia no relatório.
+    """
+    if not _debug_ctx_ativo():
+        return ""
+    try:
+        debug_ctx = json.dumps(contexto, ensure_ascii=False, indent=2)
+        return "<pre>" + html.escape(debug_ctx, quote=False) + "</pre>"
+    except Exception:
+        return "<pre>" + _esc(contexto) + "</pre>"
+
+
+def _montar_placeholders(contexto: Dict[str, Any]) -> "_Placeholders":
+    """Calcula os valores de todos os placeholders do template."""
 #    ident = contexto.get("identificacao") or {}
 #    dados_cad = _agregar_dados_cadastrais(ident)
 #    linhas_cadastrais = dados_cad["linhas_html"]
@@ -533,15 +668,11 @@ def gerar_html_basico(contexto: Dict[str, Any]) -> str:
     dados_app = _montar_dados_app(contexto)
     dados_risco = _montar_dados_risco(contexto)
 
-    agora = datetime.now()
-    data_completa = agora.strftime("%d/%m/%Y")
-    hora = agora.strftime("%H:%M")
+    agora = time.localtime()
+    data_completa = time.strftime("%d/%m/%Y", agora)
+    hora = time.strftime("%H:%M", agora)
 
-    try:
-        debug_ctx = json.dumps(contexto, ensure_ascii=False, indent=2)
-        debug_ctx_html = "<pre>" + debug_ctx.replace("<", "&lt;") + "</pre>"
-    except Exception:
-        debug_ctx_html = "<pre>" + _esc(contexto) + "</pre>"
+    debug_ctx_html = _montar_debug_ctx(contexto)
 
     placeholders = {
         "DADOS_CADASTRAIS": linhas_cadastrais,
@@ -592,17 +723,36 @@ def gerar_html_basico(contexto: Dict[str, Any]) -> str:
         "DEBUG_CTX": debug_ctx_html,
     }
 
-    html = template
-    for chave, valor in placeholders.items():
-        placeholder = "{" + chave + "}"
-        html = html.replace(placeholder, valor if valor is not None else "-")
+    return _Placeholders(
+        (chave, valor if valor is not None else "-")
+        for chave, valor in placeholders.items()
+    )
 
-    html = html.replace("{if ", "<!-- if ").replace("{endif}", "-->")
-    return html
+
+def gerar_html_basico(contexto: Dict[str, Any]) -> str:
+    """Gera o HTML final do relatório a partir do contexto."""
+    template = _carregar_template_html()
+    return _compilar_template(template).format_map(_montar_placeholders(contexto))
 
 
 class RenderizadorHTML:
-    """Fachada para geração de HTML. Redireciona para a função principal."""
+    """
+    Fachada para geração de HTML. Redireciona para a função principal.
+
+    Guarda o último contexto renderizado: pedir de novo o HTML do mesmo
+    contexto (ex.: visualização e depois exportação) reaproveita o resultado.
+    O contexto é tratado como imutável depois de construído.
+    """
+    def __init__(self):
+        self._ultimo_contexto = None
+        self._ultimo_html = None
+
     def gerar_html_basico(self, contexto: dict) -> str:
-        from .renderizador_html import gerar_html_basico as gerar_relatorio_completo
-        return gerar_relatorio_completo(contexto)
\ No newline at end of file
+        if contexto is not self._ultimo_contexto or self._ultimo_html is None:
+            from .renderizador_html import gerar_html_basico as gerar_relatorio_completo
+            self._ultimo_html = gerar_relatorio_completo(contexto)
+            self._ultimo_contexto = contexto
+        return self._ultimo_html
+
+    # Nome usado pelo serviço de aplicação (aplicacao/servicos/analise_lote.py)
+    renderizar = gerar_html_basico
\ No newline at end of file
@@ -1,35 +1,17 @@
 """Renderização do relatório final em HTML."""
 
 import os
-from typing import Dict, Any
+import re
+import logging
+from typing import Dict, Any, FrozenSet
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
-# Importar template HTML
-def carregar_template_html() -> str:
-    """Carrega o template HTML do relatório."""
-    # Tenta encontrar o template em diferentes locais
-    possiveis_caminhos = [
-        # Caminho relativo ao plugin
-        Path(__file__).parent / "templates" / "relatorio.html",
-        Path(__file__).parent / "relatorio_template.html",
-        Path(__file__).parent.parent / "templates" / "relatorio.html",
-        # Caminho absoluto (para debug)
-        Path(r"C:\Users\franciscore\AppData\Roaming\QGIS\QGIS3\profiles\default\python\plugins\zoni\templates\relatorio.html"),
-    ]
-    
-    for caminho in possiveis_caminhos:
-        if caminho.exists():
-            try:
-                with open(caminho, 'r', encoding='utf-8') as f:
-                    return f.read()
-            except Exception as e:
-                print(f"ERRO ao carregar template {caminho}: {e}")
-                continue
-    
-    # Se não encontrar o template, retorna um template mínimo
-    print("AVISO: Template HTML não encontrado, usando template mínimo")
-    return """
+log = logging.getLogger(__name__)
+
+# Template mínimo usado quando nenhum arquivo de template é encontrado
+_TEMPLATE_MINIMO = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -72,6 +54,104 @@ def carregar_template_html() -> str:
     </html>
     """
 
+# Caminhos candidatos do template, relativos ao plugin (resolvidos na importação)
+_DIR_MODULO = Path(__file__).parent
+_CAMINHOS_TEMPLATE = (
+    _DIR_MODULO / "templates" / "relatorio.html",
+    _DIR_MODULO / "relatorio_template.html",
+    _DIR_MODULO.parent / "templates" / "relatorio.html",
+)
+
+# O aviso de template ausente é emitido uma única vez por sessão
+_avisou_template_ausente = False
+
+
+# Importar template HTML
+@lru_cache(maxsize=1)
+def carregar_template_html() -> str:
+    """
+    Carrega o template HTML do relatório.
+
+    O resultado fica em cache para a sessão; use
+    `carregar_template_html.cache_clear()` para reler o arquivo.
+    """
+    # Tenta encontrar o template em diferentes locais
+    possiveis_caminhos = _CAMINHOS_TEMPLATE
+    caminho_env = os.environ.get("ZONI_TEMPLATE_HTML")
+    if caminho_env:
+        # Último recurso (para debug): caminho absoluto informado no ambiente
+        possiveis_caminhos = possiveis_caminhos + (Path(caminho_env),)
+    
+    for caminho in possiveis_caminhos:
+        try:
+            return caminho.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            continue
+        except (OSError, UnicodeDecodeError) as e:
+            # Arquivo existe mas não pôde ser lido: tenta o próximo candidato
+            log.warning("Erro ao carregar template %s: %s", caminho, e)
+            continue
+    
+    # Se não encontrar o template, retorna um template mínimo
+    global _avisou_template_ausente
+    if not _avisou_template_ausente:
+        log.warning("Template HTML não encontrado, usando template mínimo")
+        _avisou_template_ausente = True
+    return _TEMPLATE_MINIMO
+
+
+# Marcações {CHAVE} do template
+_RE_TOKEN = re.compile(r"\{[A-Z_]+\}")
+
+
+class _Substituicoes(dict):
+    """Marcações sem valor permanecem no HTML como {CHAVE}."""
+
+    def __missing__(self, chave):
+        return "{" + chave + "}"
+
+
+@lru_cache(maxsize=4)
+def _compilar_template(template_html: str) -> str:
+    """
+    "Compila" o template em string de formato para `str.format_map`, uma
+    única vez por template: mantém as marcações {CHAVE} e escapa as demais
+    chaves (CSS). A renderização passa a ser uma só passada em C.
+    """
+    partes = []
+    pos = 0
+    for m in _RE_TOKEN.finditer(template_html):
+        partes.append(template_html[pos:m.start()].replace("{", "{{").replace("}", "}}"))
+        partes.append(m.group(0))
+        pos = m.end()
+    partes.append(template_html[pos:].replace("{", "{{").replace("}", "}}"))
+    return "".join(partes)
+
+
+# Linhas da tabela de inclinação (formato compacto, sem indentação embutida)
+_LINHA_FAIXA = (
+    '<tr><td>{}</td>'
+    '<td><div class="inclinacao-cor" style="background-color: {};"></div></td>'
+    '<td>{:.2f}</td><td>{:.2f}%</td><td>{}</td></tr>'
+)
+_LINHA_TOTAL = (
+    '<tr style="font-weight: bold; background-color: #f9f9f9;">'
+    '<td>TOTAL ANALISADO</td><td></td><td>{:.2f}</td><td>100.00%</td><td></td></tr>'
+)
+_LINHA_APP = (
+    '<tr style="font-weight: bold; background-color: #ffebee;">'
+    '<td colspan="2">Área de APP por inclinação (>45°)</td>'
+    '<td>{:.2f}</td><td>{:.2f}%</td><td><span class="app-flag">APP</span></td></tr>'
+)
+# Coluna APP da faixa, indexada por bool(faixa["app"])
+_STATUS_APP = ('-', '<span class="app-flag">APP</span>')
+
+
+@lru_cache(maxsize=4)
+def _marcacoes_template(template_html: str) -> FrozenSet[str]:
+    """Conjunto das marcações {CHAVE} presentes no template."""
+    return frozenset(_RE_TOKEN.findall(template_html))
+
 
 def gerar_tabela_inclinacao(ctx: Dict[str, Any]) -> str:
     """Gera HTML para a tabela de inclinação do terreno."""
@@ -80,13 +160,13 @@ def gerar_tabela_inclinacao(ctx: Dict[str, Any]) -> str:
     faixas = inclinacao.get("faixas", [])
     mensagens = inclinacao.get("mensagens", [])
     
-    print(f"DEBUG gerar_tabela_inclinacao: {len(faixas)} faixas encontradas")
-    print(f"DEBUG gerar_tabela_inclinacao: Mensagens: {mensagens}")
+    log.debug("gerar_tabela_inclinacao: %d faixas encontradas", len(faixas))
+    log.debug("gerar_tabela_inclinacao: Mensagens: %s", mensagens)
     
     # Se não há faixas, mostrar mensagem de erro
     if not faixas:
         mensagem = mensagens[0] if mensagens else "Não foi possível analisar a inclinação do terreno"
-        print(f"DEBUG gerar_tabela_inclinacao: Sem faixas, mostrando mensagem: {mensagem}")
+        log.debug("gerar_tabela_inclinacao: Sem faixas, mostrando mensagem: %s", mensagem)
         return f'''
             <tr>
                 <td colspan="5" style="text-align: center; padding: 20px; color: #666;">
@@ -96,59 +176,67 @@ def gerar_tabela_inclinacao(ctx: Dict[str, Any]) -> str:
             </tr>
         '''
     
-    linhas = []
-    for i, faixa in enumerate(faixas):
-        cor = faixa.get('cor', '#cccccc')
-        label = faixa.get('faixa', f'Faixa {i+1}')
-        area_m2 = float(faixa.get('area_m2', 0.0))
-        percentual = float(faixa.get('percentual', 0.0))
-        is_app = bool(faixa.get('app', False))
-        
-        status_app = '<span class="app-flag">APP</span>' if is_app else '-'
-        
-        linha = f'''
-            <tr>
-                <td>{label}</td>
-                <td><div class="inclinacao-cor" style="background-color: {cor};"></div></td>
-                <td>{area_m2:.2f}</td>
-                <td>{percentual:.2f}%</td>
-                <td>{status_app}</td>
-            </tr>
-        '''
-        linhas.append(linha)
-        print(f"DEBUG gerar_tabela_inclinacao: Faixa {i+1}: {label}, {area_m2:.2f} m², APP: {is_app}")
+    # Uma única passada: cada faixa vira a tupla de colunas já convertidas,
+    # e a formatação das linhas é feita de uma vez a partir dessas tuplas.
+    colunas = [
+        (
+            faixa['faixa'] if 'faixa' in faixa else f'Faixa {i}',
+            faixa.get('cor', '#cccccc'),
+            float(faixa.get('area_m2', 0.0)),
+            float(faixa.get('percentual', 0.0)),
+            _STATUS_APP[bool(faixa.get('app', False))],
+        )
+        for i, faixa in enumerate(faixas, 1)
+    ]
+    linhas = [_LINHA_FAIXA.format(*c) for c in colunas]
+
+    if log.isEnabledFor(logging.DEBUG):
+        for i, (label, _cor, area_m2, _perc, status_app) in enumerate(colunas, 1):
+            log.debug("gerar_tabela_inclinacao: Faixa %d: %s, %.2f m², APP: %s",
+                      i, label, area_m2, status_app is _STATUS_APP[1])
     
     # Adicionar linha de total
     area_total = float(inclinacao.get("area_total_m2", 0.0))
     if area_total > 0:
-        linhas.append(f'''
-            <tr style="font-weight: bold; background-color: #f9f9f9;">
-                <td>TOTAL ANALISADO</td>
-                <td></td>
-                <td>{area_total:.2f}</td>
-                <td>100.00%</td>
-                <td></td>
-            </tr>
-        ''')
+        linhas.append(_LINHA_TOTAL.format(area_total))
     
     # Adicionar linha de APP se houver
     area_app = float(inclinacao.get("area_app_inclinacao_m2", 0.0))
     percentual_app = float(inclinacao.get("percentual_app_inclinacao", 0.0))
     
     if area_app > 0:
-        linhas.append(f'''
-            <tr style="font-weight: bold; background-color: #ffebee;">
-                <td colspan="2">Área de APP por inclinação (>45°)</td>
-                <td>{area_app:.2f}</td>
-                <td>{percentual_app:.2f}%</td>
-                <td><span class="app-flag">APP</span></td>
-            </tr>
-        ''')
-        print(f"DEBUG gerar_tabela_inclinacao: APP detectada: {area_app:.2f} m² ({percentual_app:.2f}%)")
+        linhas.append(_LINHA_APP.format(area_app, percentual_app))
+        log.debug("gerar_tabela_inclinacao: APP detectada: %.2f m² (%.2f%%)", area_app, percentual_app)
     
     return '\n'.join(linhas)
 
 
+def _area_lote(ctx: Dict[str, Any]) -> str:
+    """Área do (primeiro) lote formatada com 2 casas decimais."""
+    identificacao = ctx.get("identificacao", {})
+    if isinstance(identificacao, list) and identificacao:
+        identificacao = identificacao[0]
+    return f"{identificacao.get('area_m2', 0):.2f}" if identificacao else "0.00"
+
+
+# Substituições que não dependem do contexto
+_VALORES_FIXOS = {
+    "VERSAO": "2.0.0",
+    "TIPO_ANALISE": "Lote único",
+    "N_LOTES": "1",
+}
+
+# Marcação -> função que calcula seu valor a partir do contexto
+_CONSTRUTORES = {
+    "TABELA_INCLINACAO": gerar_tabela_inclinacao,
+    "DEBUG_INFO": lambda ctx: str(ctx.get("inclinacao", {}))[:500],  # Debug info limitada
+    "AREA_LOTE": _area_lote,
+    "N_TESTADAS": lambda ctx: len(ctx.get("testadas_por_logradouro", {})),
+    "TESTADA_PRINCIPAL": lambda ctx: ctx.get("testada_principal", "Não identificada"),
+    # ... (adicione aqui as outras substituições do seu template)
+}
+
+
 def gerar_html_basico(ctx: Dict[str, Any], template_html: str = None) -> str:
     """
     Substitui as marcações { ... } no template pelo conteúdo de ctx.
@@ -162,43 +250,27 @@ def gerar_html_basico(ctx: Dict[str, Any], template_html: str = None) -> str:
     if template_html is None:
         template_html = carregar_template_html()
     
-    # Processar dados de inclinação
-    tabela_inclinacao = gerar_tabela_inclinacao(ctx)
+    # Só são calculados os valores das marcações que o template realmente usa
+    # (no template mínimo, por exemplo, a tabela de inclinação nem é montada)
+    marcacoes = _marcacoes_template(template_html)
     
-    # Data e hora atual
-    agora = datetime.now()
-    
-    # Substituições principais
-    substituicoes = {
-        "{TABELA_INCLINACAO}": tabela_inclinacao,
-        "{DATA_COMPLETA}": agora.strftime("%d/%m/%Y"),
-        "{HORA}": agora.strftime("%H:%M"),
-        "{VERSAO}": "2.0.0",
-        "{TIPO_ANALISE}": "Lote único",
-        "{DEBUG_INFO}": str(ctx.get("inclinacao", {}))[:500],  # Debug info limitada
-    }
-    
-    # Substituições para dados cadastrais
-    identificacao = ctx.get("identificacao", {})
-    if isinstance(identificacao, list) and identificacao:
-        identificacao = identificacao[0]
+    valores = _Substituicoes(_VALORES_FIXOS)
+    for marcacao in marcacoes:
+        chave = marcacao[1:-1]
+        construtor = _CONSTRUTORES.get(chave)
+        if construtor is not None:
+            valores[chave] = str(construtor(ctx))
     
-    substituicoes.update({
-        "{AREA_LOTE}": f"{identificacao.get('area_m2', 0):.2f}" if identificacao else "0.00",
-        "{N_LOTES}": "1",
-        "{N_TESTADAS}": str(len(ctx.get("testadas_por_logradouro", {}))),
-        "{TESTADA_PRINCIPAL}": ctx.get("testada_principal", "Não identificada"),
-    })
-    
-    # Adicionar substituições para outras seções do seu template original
-    # ... (adicione aqui as outras substituições do seu template)
+    # Data e hora atual
+    if "{DATA_COMPLETA}" in marcacoes or "{HORA}" in marcacoes:
+        agora = datetime.now()
+        valores["DATA_COMPLETA"] = agora.strftime("%d/%m/%Y")
+        valores["HORA"] = agora.strftime("%H:%M")
     
-    # Aplicar substituições no template
-    html = template_html
-    for key, value in substituicoes.items():
-        html = html.replace(key, str(value))
+    # Aplicar substituições no template (compilado uma vez e reaproveitado)
+    html = _compilar_template(template_html).format_map(valores)
     
-    print(f"DEBUG gerar_html_basico: Template processado com {len(substituicoes)} substituições")
+    log.debug("gerar_html_basico: Template processado com %d substituições", len(valores))
     return html
 
 
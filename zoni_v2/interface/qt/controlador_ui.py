@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 import os
+import logging
 from datetime import datetime
 
 from qgis.PyQt.QtWidgets import (
+    QApplication,
     QDialog,
     QVBoxLayout,
     QTextBrowser,
@@ -11,8 +13,9 @@ from qgis.PyQt.QtWidgets import (
     QFileDialog,
     QHBoxLayout,
 )
-from qgis.PyQt.QtCore import QTimer
-from qgis.core import QgsProject
+from qgis.PyQt.QtCore import QEventLoop, QTimer
+from qgis.PyQt.QtPrintSupport import QPrintDialog, QPrinter
+from qgis.core import QgsFeatureRequest, QgsProject
 
 # IMPORTS CORRETOS
 from ...dominio.motores.motor_analise_lote import CenarioEdificacao, analisar_lote
@@ -20,9 +23,11 @@ from ...infraestrutura.relatorios.construtor_relatorio import construir_contexto
 from ...infraestrutura.relatorios.renderizador_html import gerar_html_basico
 from ...infraestrutura.espacial.config_camadas import registrar_camada, MAPA_CAMADAS
 from ...infraestrutura.espacial.validadores import lotes_sao_contiguos
-from ...infraestrutura.espacial.geometrias import unir_geometrias
+from ...infraestrutura.espacial.geometrias import preparar_geometria, unir_geometrias
 from ...infraestrutura.espacial.zoneamento_lote import _montar_dados_lote_basicos
 
+log = logging.getLogger(__name__)
+
 
 class ControladorUI:
     def __init__(self, ui, iface):
@@ -32,11 +37,23 @@ class ControladorUI:
         # Estado
         self.lotes_selecionados = []
         self.selection_connection = None
-        self.selection_timer = None
         self.camada_lotes_atual = None
         self._enter_filter = None
         self._event_filter_target = None
 
+        # Requisição reaproveitada pelo diagnóstico da APP faixa (_debug_app_faixa).
+        # ExactIntersect: o provedor descarta, em C++, feições que só tocam o
+        # retângulo pelo bbox; setNoAttributes deve vir depois de setFlags.
+        self._req_debug_app = QgsFeatureRequest().setLimit(100)
+        self._req_debug_app.setFlags(QgsFeatureRequest.ExactIntersect)
+        self._req_debug_app.setNoAttributes()
+
+        # Temporizador único de debounce da seleção: cada start() reinicia a
+        # contagem, então rajadas de selectionChanged geram um só processamento.
+        self.selection_timer = QTimer()
+        self.selection_timer.setSingleShot(True)
+        self.selection_timer.timeout.connect(self._processar_atualizacao_selecao)
+
         # Conectar sinais da UI
         self.ui.sinal_iniciar_selecao.connect(self.iniciar_selecao_lotes)
         self.ui.sinal_executar_analise.connect(self.executar_analise_zoni_v2)
@@ -72,12 +89,6 @@ class ControladorUI:
             self.selection_connection = None
 
     def _atualizar_selecao_lotes(self):
-        if self.selection_timer:
-            self.selection_timer.stop()
-
-        self.selection_timer = QTimer()
-        self.selection_timer.setSingleShot(True)
-        self.selection_timer.timeout.connect(self._processar_atualizacao_selecao)
         self.selection_timer.start(100)
 
     def _processar_atualizacao_selecao(self):
@@ -96,15 +107,13 @@ class ControladorUI:
 
             if selecionadas:
                 self.lotes_selecionados = selecionadas
-                self.ui.botao_analisar.setEnabled(True)
+                self.ui.definir_selecao_lotes(True)
                 count = len(selecionadas)
                 mensagem = f"{count} lote(s) selecionado(s) na camada '{camada.name()}'"
                 self.iface.messageBar().pushInfo("Zôni v2", mensagem)
             else:
                 self.lotes_selecionados = []
-                self.ui.botao_analisar.setEnabled(False)
-
-        self.selection_timer = None
+                self.ui.definir_selecao_lotes(False)
 
     def _on_camada_lotes_changed(self):
         self._configurar_monitor_selecao()
@@ -144,11 +153,10 @@ class ControladorUI:
         if self._event_filter_target and self._enter_filter:
             self._event_filter_target.removeEventFilter(self._enter_filter)
 
-        from qgis.PyQt.QtWidgets import QApplication
-
-        QApplication.processEvents()
-        self.iface.mapCanvas().refresh()
-        QApplication.processEvents()
+        # Uma única passada no laço de eventos, sem entrada do usuário, para
+        # que a ferramenta de seleção conclua a última seleção antes da leitura.
+        # O canvas se redesenha sozinho; não é preciso forçar refresh().
+        QApplication.processEvents(QEventLoop.ExcludeUserInputEvents)
 
         camada_lotes = self.ui.combo_lotes.currentLayer()
 
@@ -171,7 +179,7 @@ class ControladorUI:
             return
 
         self.lotes_selecionados = selecionados
-        self.ui.botao_analisar.setEnabled(True)
+        self.ui.definir_selecao_lotes(True)
 
         self.ui.show()
         self.ui.raise_()
@@ -192,45 +200,60 @@ class ControladorUI:
     def _obter_camada_lotes_atual(self):
         return self.ui.combo_lotes.currentLayer() if self.ui.combo_lotes else None
 
+    def _debug_app_faixa(self, geom, rotulo):
+        """
+        Registra no log (nível DEBUG) as feições da APP faixa que intersectam
+        `geom`. Só deve ser chamado com DEBUG habilitado: repete parte do
+        trabalho espacial já feito por analisar_lote.
+        """
+        camada_faixa = self._layer(self.ui.combo_app_nuic, "faixa_app_nuic")
+        if not camada_faixa or geom is None or geom.isEmpty():
+            log.debug("Camada de APP faixa não disponível ou geometria inválida")
+            return
+
+        # 1ª passada: só geometrias (sem atributos) para o teste de interseção
+        request = self._req_debug_app
+        request.setFilterRect(geom.boundingBox())
+        motor = preparar_geometria(geom)
+        n_candidatas = 0
+        fids_hit = []
+        for feat in camada_faixa.getFeatures(request):
+            n_candidatas += 1
+            geom_app = feat.geometry()
+            if not geom_app.isEmpty() and motor.intersects(geom_app.constGet()):
+                fids_hit.append(feat.id())
+            else:
+                log.debug("  Feição dentro do bbox mas não intersecta")
+        log.debug("Feições da APP faixa na área do %s: %d", rotulo, n_candidatas)
+        if not fids_hit:
+            return
+
+        # 2ª passada: atributos apenas das que intersectam, sem geometria
+        request = QgsFeatureRequest().setFilterFids(fids_hit)
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        nomes = camada_faixa.fields().names()
+        for feat in camada_faixa.getFeatures(request):
+            log.debug("  Interseção encontrada!")
+            for nome, valor in zip(nomes, feat.attributes()):
+                log.debug("    %s: %s", nome, valor)
+
     # ------------------------------------------------------------------ #
     # EXECUÇÃO DE ANÁLISE                                                #
     # ------------------------------------------------------------------ #
     def executar_analise_zoni_v2(self):
         """Executa a análise completa do lote/gleba."""
-        # --- Imports relativos dentro da função ---
-        try:
-            from ...infraestrutura.espacial.geometrias import unir_geometrias
-            from ...infraestrutura.espacial.validadores import lotes_sao_contiguos
-            from ...dominio.motores.motor_analise_lote import (
-                analisar_lote,
-                CenarioEdificacao,
-            )
-            from ...infraestrutura.relatorios.construtor_relatorio import construir_contexto_relatorio
-            from ...infraestrutura.relatorios.renderizador_html import gerar_html_basico
-            from ...compartilhado.caminhos import obter_caminho_parametros
-            from qgis.core import QgsFeatureRequest
-        except ImportError:
-            from infraestrutura.espacial.geometrias import unir_geometrias
-            from infraestrutura.espacial.validadores import lotes_sao_contiguos
-            from dominio.motores.motor_analise_lote import (
-                analisar_lote,
-                CenarioEdificacao,
-            )
-            from infraestrutura.relatorios.construtor_relatorio import construir_contexto_relatorio
-            from infraestrutura.relatorios.renderizador_html import gerar_html_basico
-            from compartilhado.caminhos import obter_caminho_parametros
-            from qgis.core import QgsFeatureRequest
-
         # DEBUG CAMADA APP FAIXA
-        camada_app_faixa = self._layer(self.ui.combo_app_nuic, "faixa_app_nuic")
-        print("=== DEBUG CAMADA APP FAIXA ===")
-        print(f"Camada: {camada_app_faixa}")
-        if camada_app_faixa:
-            print(f"  Nome: {camada_app_faixa.name()}")
-            print(f"  Válida? {camada_app_faixa.isValid()}")
-            print(f"  CRS: {camada_app_faixa.crs().authid()}")
-            print(f"  Feições: {camada_app_faixa.featureCount()}")
-        print("===============================")
+        if log.isEnabledFor(logging.DEBUG):
+            camada_app_faixa = self._layer(self.ui.combo_app_nuic, "faixa_app_nuic")
+            log.debug("Camada APP faixa: %s", camada_app_faixa)
+            if camada_app_faixa:
+                log.debug(
+                    "  Nome: %s | Válida? %s | CRS: %s | Feições: %s",
+                    camada_app_faixa.name(),
+                    camada_app_faixa.isValid(),
+                    camada_app_faixa.crs().authid(),
+                    camada_app_faixa.featureCount(),
+                )
 
         if not self.lotes_selecionados:
             camada_lotes = self._obter_camada_lotes_atual()
@@ -298,27 +321,6 @@ class ControladorUI:
                 )
                 return
 
-            # --- DEBUG APP FAIXA (GLEBA) ---
-            camada_faixa = self._layer(self.ui.combo_app_nuic, "faixa_app_nuic")
-            if camada_faixa and geom_unificada:
-                bbox = geom_unificada.boundingBox()
-                request = QgsFeatureRequest().setFilterRect(bbox).setLimit(100)
-                features = list(camada_faixa.getFeatures(request))
-                print(f"🔵 Feições da APP faixa na área da gleba: {len(features)}")
-                for feat in features:
-                    geom_app = feat.geometry()
-                    if geom_app.intersects(geom_unificada):
-                        print("  ✅ Interseção encontrada!")
-                        attrs = feat.attributes()
-                        fields = feat.fields().names()
-                        for i, f in enumerate(fields):
-                            print(f"    {f}: {attrs[i]}")
-                    else:
-                        print("  ❌ Feição dentro do bbox mas não intersecta")
-            else:
-                print("🔵 Camada de APP faixa não disponível ou geometria inválida")
-            # --------------------------------------
-
 #            # Cálculo da área total (soma dos campos de área ou área geométrica)
 #            area_total = 0.0
 #            for f in self.lotes_selecionados:
@@ -331,41 +333,14 @@ class ControladorUI:
 #                    area_total += f.geometry().area() if f.geometry() else 0.0
 
             # Área real da gleba = área do polígono unificado
-            area_gleba = geom_unificada.area()
-
-#            cenario = CenarioEdificacao(area_lote_m2=area_total)
-            cenario = CenarioEdificacao(area_lote_m2=area_gleba)
-
-            analise = analisar_lote(
-                geom_lote=geom_unificada,
-                cenario=cenario,
-                caminho_parametros_zoneamento=caminho_json,
+            self._analisar_e_exibir(
+                geom_unificada,
+                geom_unificada.area(),
+                self.lotes_selecionados,
+                caminho_json,
+                "Relatório Zôni v2 – Gleba Unificada",
+                gleba=True,
             )
-
-            # Armazena a área da gleba no objeto de análise para uso no relatório
-            analise.area_gleba_unificada = area_gleba
-
-            # Nota 37: automática no motor (UI não faz nada)
-            if getattr(analise, "detectou_frente_nota_37", False):
-                pass
-
-            # Nota 10: confirmação do usuário
-            if getattr(analise, "detectou_frente_nota_10", False):
-                nome_via = getattr(
-                    analise,
-                    "nome_via_nota_10",
-                    "logradouro detectado"
-                )
-
-                aplicar = self.ui.confirmar_nota10_acesso_unico(nome_via)
-
-                if aplicar:
-                    analise.aplicar_nota_10()
-
-            lista_dados_lote = [_montar_dados_lote_basicos(f) for f in self.lotes_selecionados]
-            contexto = construir_contexto_relatorio(lista_dados_lote, analise)
-            html = gerar_html_basico(contexto)
-            self._mostrar_relatorio_html(html, "Relatório Zôni v2 – Gleba Unificada")
             return
 
         # ============================================================
@@ -378,50 +353,39 @@ class ControladorUI:
             self.iface.messageBar().pushWarning("Zôni v2", "Geometria do lote inválida.")
             return
 
-        # --- DEBUG APP FAIXA (LOTE ÚNICO) ---
-        camada_faixa = self._layer(self.ui.combo_app_nuic, "faixa_app_nuic")
-        if camada_faixa and geom_lote:
-            bbox = geom_lote.boundingBox()
-            request = QgsFeatureRequest().setFilterRect(bbox).setLimit(100)
-            features = list(camada_faixa.getFeatures(request))
-            print(f"🔵 Feições da APP faixa na área do lote: {len(features)}")
-            for feat in features:
-                geom_app = feat.geometry()
-                if geom_app.intersects(geom_lote):
-                    print("  ✅ Interseção encontrada!")
-                    attrs = feat.attributes()
-                    fields = feat.fields().names()
-                    for i, f in enumerate(fields):
-                        print(f"    {f}: {attrs[i]}")
-                else:
-                    print("  ❌ Feição dentro do bbox mas não intersecta")
-        else:
-            print("🔵 Camada de APP faixa não disponível ou geometria inválida")
-        # --------------------------------------
-
-        nomes = feat_lote.fields().names()
-        if "área" in nomes:
-            area_lote = feat_lote["área"]
-        elif "area" in nomes:
-            area_lote = feat_lote["area"]
-        else:
-            area_lote = geom_lote.area()
-
-        cenario = CenarioEdificacao(
-            area_lote_m2=area_lote,
-            area_construida_total_m2=None,
-            area_ocupada_projecao_m2=None,
-            area_permeavel_m2=None,
-            altura_maxima_m=None,
-            numero_pavimentos=None,
+        idx_area = feat_lote.fieldNameIndex("área")
+        if idx_area < 0:
+            idx_area = feat_lote.fieldNameIndex("area")
+        area_lote = feat_lote.attribute(idx_area) if idx_area >= 0 else geom_lote.area()
+
+        self._analisar_e_exibir(
+            geom_lote,
+            area_lote,
+            [feat_lote],
+            caminho_json,
+            "Relatório Zôni v2 – Lote",
         )
 
+    def _analisar_e_exibir(self, geom, area, feicoes, caminho_json, titulo, gleba=False):
+        """
+        Etapa comum a lote único e gleba: executa a análise sobre `geom`,
+        trata as notas 37/10, monta o relatório de `feicoes` e o exibe.
+        """
+        if log.isEnabledFor(logging.DEBUG):
+            self._debug_app_faixa(geom, "gleba" if gleba else "lote")
+
+        cenario = CenarioEdificacao(area_lote_m2=area)
+
         analise = analisar_lote(
-            geom_lote=geom_lote,
+            geom_lote=geom,
             cenario=cenario,
             caminho_parametros_zoneamento=caminho_json,
         )
 
+        if gleba:
+            # Armazena a área da gleba no objeto de análise para uso no relatório
+            analise.area_gleba_unificada = area
+
         # Nota 37: automática no motor (UI não faz nada)
         if getattr(analise, "detectou_frente_nota_37", False):
             pass
@@ -439,11 +403,11 @@ class ControladorUI:
             if aplicar:
                 analise.aplicar_nota_10()
 
-        lista_dados_lote = [_montar_dados_lote_basicos(feat_lote)]
+        lista_dados_lote = [_montar_dados_lote_basicos(f) for f in feicoes]
         contexto = construir_contexto_relatorio(lista_dados_lote, analise)
         html = gerar_html_basico(contexto)
 
-        self._mostrar_relatorio_html(html, "Relatório Zôni v2 – Lote")
+        self._mostrar_relatorio_html(html, titulo)
 
     # ------------------------------------------------------------------ #
     # EXIBIÇÃO DO RELATÓRIO                                              #
@@ -455,12 +419,18 @@ class ControladorUI:
 
         button_layout = QHBoxLayout()
 
+        # O HTML é interpretado uma única vez pelo visor; o mesmo documento
+        # é reaproveitado para salvar em PDF e imprimir.
+        visor = QTextBrowser(dlg)
+        visor.setHtml(html)
+        documento = visor.document()
+
         btn_salvar_pdf = QPushButton("💾 Salvar como PDF")
-        btn_salvar_pdf.clicked.connect(lambda: self._salvar_como_pdf(html, titulo))
+        btn_salvar_pdf.clicked.connect(lambda: self._salvar_como_pdf(documento, titulo))
         button_layout.addWidget(btn_salvar_pdf)
 
         btn_imprimir = QPushButton("🖨️ Imprimir")
-        btn_imprimir.clicked.connect(lambda: self._imprimir_html(html))
+        btn_imprimir.clicked.connect(lambda: self._imprimir_html(documento))
         button_layout.addWidget(btn_imprimir)
 
         btn_fechar = QPushButton("Fechar")
@@ -470,19 +440,13 @@ class ControladorUI:
         button_layout.addStretch()
         layout.addLayout(button_layout)
 
-        visor = QTextBrowser(dlg)
-        visor.setHtml(html)
         layout.addWidget(visor)
 
         dlg.resize(950, 700)
         dlg.exec_()
 
-    def _salvar_como_pdf(self, html: str, titulo: str):
-        """Salva o relatório HTML como arquivo PDF."""
-        from PyQt5.QtPrintSupport import QPrinter
-        from PyQt5.QtGui import QTextDocument
-        from PyQt5.QtWidgets import QFileDialog, QMessageBox
-
+    def _salvar_como_pdf(self, documento, titulo: str):
+        """Salva o relatório (QTextDocument já montado) como arquivo PDF."""
         data_hora = datetime.now().strftime("%Y%m%d_%H%M%S")
         nome_sugerido = f"Zoni_v2_{data_hora}.pdf"
 
@@ -504,9 +468,7 @@ class ControladorUI:
         printer.setPageSize(QPrinter.A4)
         printer.setOrientation(QPrinter.Portrait)
 
-        document = QTextDocument()
-        document.setHtml(html)
-        document.print_(printer)
+        documento.print_(printer)
 
         QMessageBox.information(
             self.iface.mainWindow(),
@@ -514,19 +476,13 @@ class ControladorUI:
             f"Relatório salvo como:\n{file_path}",
         )
 
-    def _imprimir_html(self, html: str):
-        """Imprime o relatório HTML."""
-        from PyQt5.QtPrintSupport import QPrinter, QPrintDialog
-        from PyQt5.QtGui import QTextDocument
-        from PyQt5.QtWidgets import QMessageBox
-
+    def _imprimir_html(self, documento):
+        """Imprime o relatório (QTextDocument já montado)."""
         printer = QPrinter(QPrinter.HighResolution)
         dialog = QPrintDialog(printer, self.iface.mainWindow())
 
         if dialog.exec_() == QPrintDialog.Accepted:
-            document = QTextDocument()
-            document.setHtml(html)
-            document.print_(printer)
+            documento.print_(printer)
             QMessageBox.information(
                 self.iface.mainWindow(),
                 "Impressão",
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import re
+
 from qgis.PyQt.QtWidgets import (
     QDialog,
     QVBoxLayout,
@@ -11,10 +13,71 @@ from qgis.PyQt.QtWidgets import (
 
 from qgis.PyQt.QtCore import pyqtSignal, Qt, QObject, QEvent
 from qgis.gui import QgsMapLayerComboBox
-from qgis.core import QgsMapLayerProxyModel, QgsProject
+from qgis.core import QgsMapLayer, QgsMapLayerProxyModel, QgsProject, QgsWkbTypes
 
 from ...infraestrutura.espacial.config_camadas import registrar_camada, MAPA_CAMADAS
 
+# Trecho do nome da camada (em minúsculas) -> chave em MAPA_CAMADAS,
+# separados pelo tipo de camada em que a chave faz sentido
+_PADROES_POR_TIPO = {
+    "poligono": {
+        "-lote": "lotes",
+        "gleba": "lotes",
+        "zoneamento": "zoneamento",
+        "_llnuiapp": "faixa_app_nuic",
+        "_area_manguezal": "app_manguezal",
+        "_inundacao": "susc_inundacao",
+        "_movimento_massa": "susc_mov_massa",
+    },
+    "linha": {
+        "logradouros": "logradouros",
+        "_llnuiapp": "faixa_app_nuic",
+    },
+    "raster": {
+        "pb.slope.graus": "app_inclinacao",
+    },
+}
+# Uma única alternância por tipo: cada nome é varrido uma vez, em C, só
+# contra os trechos do seu tipo (guarda-se o finditer já vinculado)
+_BUSCAS_POR_TIPO = {
+    tipo: re.compile("|".join(map(re.escape, padroes))).finditer
+    for tipo, padroes in _PADROES_POR_TIPO.items()
+}
+
+_TIPOS_GEOMETRIA = {
+    QgsWkbTypes.PolygonGeometry: "poligono",
+    QgsWkbTypes.LineGeometry: "linha",
+}
+
+
+def _tipo_camada(layer):
+    """Tipo da camada para fins de classificação (None = não classificável)."""
+    if layer.type() == QgsMapLayer.RasterLayer:
+        return "raster"
+    if layer.type() == QgsMapLayer.VectorLayer:
+        return _TIPOS_GEOMETRIA.get(layer.geometryType())
+    return None
+
+
+def _classificar_camadas(projeto) -> dict:
+    """
+    Associa as camadas do projeto às chaves de MAPA_CAMADAS pelo nome.
+
+    Em caso de várias camadas para a mesma chave, vale a última, como no
+    registro feito camada a camada.
+    """
+    camadas_por_tipo = (
+        (layer, tipo)
+        for layer in projeto.mapLayers().values()
+        for tipo in (_tipo_camada(layer),)
+        if tipo is not None
+    )
+    return {
+        _PADROES_POR_TIPO[tipo][m.group()]: layer
+        for layer, tipo in camadas_por_tipo
+        for m in _BUSCAS_POR_TIPO[tipo](layer.name().lower())
+    }
+
 
 class EnterKeyFilter(QObject):
     """Filtro simples para capturar ENTER e finalizar seleção."""
@@ -51,6 +114,12 @@ class ZoniDialog(QDialog):
         self.botao_selecionar = None
         self.botao_analisar = None
 
+        # Combos obrigatórios (lotes, zoneamento) e bitmask de quais já têm
+        # camada (bit i = combo i); as demais camadas são opcionais na análise
+        self._combos = ()
+        self._combo_state = 0
+        self._selecao_lotes = False
+
         self.chk_nota10 = None
         self.chk_nota37 = None
 
@@ -58,85 +127,61 @@ class ZoniDialog(QDialog):
 
     def _montar_ui(self):
         self.setWindowTitle("Zôni v2 – Seleção de Camadas")
+
+        # Sem repintura enquanto os widgets são montados; reativada uma vez no fim
+        self.setUpdatesEnabled(False)
+        try:
+            self._montar_widgets()
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def _montar_widgets(self):
         layout = QVBoxLayout(self)
 
         MAPA_CAMADAS.clear()
-        for layer in QgsProject.instance().mapLayers().values():
-            name = layer.name().lower()
-
-            if any(k in name for k in ["-lote", "gleba"]):
-                registrar_camada("lotes", layer)
-            if "zoneamento" in name:
-                registrar_camada("zoneamento", layer)
-            if "logradouros" in name:
-                registrar_camada("logradouros", layer)
-            if "_llnuiapp" in name:
-                registrar_camada("faixa_app_nuic", layer)
-            if "_area_manguezal" in name:
-                registrar_camada("app_manguezal", layer)
-            if "pb.slope.graus" in name:
-                registrar_camada("app_inclinacao", layer)
-            if "_inundacao" in name:
-                registrar_camada("susc_inundacao", layer)
-            if "_movimento_massa" in name:
-                registrar_camada("susc_mov_massa", layer)
+        for chave, layer in _classificar_camadas(QgsProject.instance()).items():
+            registrar_camada(chave, layer)
 
         layout.addWidget(QLabel("Camada de LOTES (polígonos):"))
-        self.combo_lotes = QgsMapLayerComboBox()
-        self.combo_lotes.setFilters(QgsMapLayerProxyModel.PolygonLayer)
+        self.combo_lotes = self._novo_combo(QgsMapLayerProxyModel.PolygonLayer, "lotes")
         layout.addWidget(self.combo_lotes)
-        self._auto_set_combo(self.combo_lotes, "lotes")
 
         layout.addWidget(QLabel("Camada de ZONEAMENTO (polígonos):"))
-        self.combo_zoneamento = QgsMapLayerComboBox()
-        self.combo_zoneamento.setFilters(QgsMapLayerProxyModel.PolygonLayer)
+        self.combo_zoneamento = self._novo_combo(QgsMapLayerProxyModel.PolygonLayer, "zoneamento")
         layout.addWidget(self.combo_zoneamento)
-        self._auto_set_combo(self.combo_zoneamento, "zoneamento")
 
         layout.addWidget(QLabel("Camada de LOGRADOUROS (linhas):"))
-        self.combo_logradouros = QgsMapLayerComboBox()
-        self.combo_logradouros.setFilters(QgsMapLayerProxyModel.LineLayer)
+        self.combo_logradouros = self._novo_combo(QgsMapLayerProxyModel.LineLayer, "logradouros")
         layout.addWidget(self.combo_logradouros)
-        self._auto_set_combo(self.combo_logradouros, "logradouros")
 
         app_group = QGroupBox("Camadas de APP")
         app_layout = QGridLayout(app_group)
 
         app_layout.addWidget(QLabel("Faixa APP - NUIC (polígonos):"), 0, 0)
-        self.combo_app_nuic = QgsMapLayerComboBox()
-        self.combo_app_nuic.setFilters(QgsMapLayerProxyModel.PolygonLayer)
+        self.combo_app_nuic = self._novo_combo(QgsMapLayerProxyModel.PolygonLayer, "faixa_app_nuic")
         app_layout.addWidget(self.combo_app_nuic, 0, 1)
-        self._auto_set_combo(self.combo_app_nuic, "faixa_app_nuic")
 
         app_layout.addWidget(QLabel("APP - Manguezais (polígonos):"), 1, 0)
-        self.combo_app_manguezal = QgsMapLayerComboBox()
-        self.combo_app_manguezal.setFilters(QgsMapLayerProxyModel.PolygonLayer)
+        self.combo_app_manguezal = self._novo_combo(QgsMapLayerProxyModel.PolygonLayer, "app_manguezal")
         app_layout.addWidget(self.combo_app_manguezal, 1, 1)
-        self._auto_set_combo(self.combo_app_manguezal, "app_manguezal")
 
         app_layout.addWidget(QLabel("APP - por Inclinação (raster):"), 2, 0)
-        self.combo_app_inclinacao = QgsMapLayerComboBox()
-        self.combo_app_inclinacao.setFilters(QgsMapLayerProxyModel.RasterLayer)
+        self.combo_app_inclinacao = self._novo_combo(QgsMapLayerProxyModel.RasterLayer, "app_inclinacao")
         app_layout.addWidget(self.combo_app_inclinacao, 2, 1)
-        self._auto_set_combo(self.combo_app_inclinacao, "app_inclinacao")
 
         layout.addWidget(app_group)
 
         layout.addWidget(QLabel("Camada de RISCO – Movimentos de Massa (polígonos):"))
-        self.combo_risco_geo = QgsMapLayerComboBox()
-        self.combo_risco_geo.setFilters(QgsMapLayerProxyModel.PolygonLayer)
+        self.combo_risco_geo = self._novo_combo(QgsMapLayerProxyModel.PolygonLayer, "susc_mov_massa")
         layout.addWidget(self.combo_risco_geo)
-        self._auto_set_combo(self.combo_risco_geo, "susc_mov_massa")
 
         layout.addWidget(QLabel("Camada de RISCO – Inundação (polígonos):"))
-        self.combo_risco_inun = QgsMapLayerComboBox()
-        self.combo_risco_inun.setFilters(QgsMapLayerProxyModel.PolygonLayer)
+        self.combo_risco_inun = self._novo_combo(QgsMapLayerProxyModel.PolygonLayer, "susc_inundacao")
         layout.addWidget(self.combo_risco_inun)
-        self._auto_set_combo(self.combo_risco_inun, "susc_inundacao")
 
         layout.addWidget(
             QLabel(
-                "1) Preencha todas as camadas acima.\n"
+                "1) Escolha as camadas acima (LOTES e ZONEAMENTO são obrigatórias).\n"
                 "2) Selecione lotes diretamente na camada 'Lotes' OU use o botão abaixo.\n"
                 "3) Clique em 'Analisar' para gerar o relatório.\n\n"
                 "Dica: Você pode selecionar lotes antes ou depois de abrir esta janela."
@@ -155,8 +200,50 @@ class ZoniDialog(QDialog):
         self.botao_analisar.clicked.connect(self.sinal_executar_analise.emit)
         layout.addWidget(self.botao_analisar)
 
+        self._combos = (self.combo_lotes, self.combo_zoneamento)
+        # Estado inicial (os combos foram configurados com sinais bloqueados);
+        # depois disso o bitmask é mantido pelos sinais, sem varrer os combos
+        self._combo_state = 0
+        for i, combo in enumerate(self._combos):
+            if combo.currentLayer() is not None:
+                self._combo_state |= 1 << i
+            combo.layerChanged.connect(lambda lyr, i=i: self._on_combo(i, lyr))
+
         self.resize(520, 720)
 
+    def _on_combo(self, indice: int, camada):
+        if camada is not None:
+            self._combo_state |= 1 << indice
+        else:
+            self._combo_state &= ~(1 << indice)
+        self._atualizar_botao_analisar()
+
+    def definir_selecao_lotes(self, ha_selecao: bool):
+        """Informa se há lotes selecionados (chamado pelo controlador)."""
+        self._selecao_lotes = ha_selecao
+        self._atualizar_botao_analisar()
+
+    def _atualizar_botao_analisar(self):
+        """Habilita 'Analisar' com lotes selecionados e as camadas obrigatórias escolhidas."""
+        completos = (1 << len(self._combos)) - 1
+        self.botao_analisar.setEnabled(
+            self._selecao_lotes and self._combo_state == completos
+        )
+
+    def _novo_combo(self, filtro, chave: str) -> QgsMapLayerComboBox:
+        """
+        Cria um combo de camadas já filtrado e apontando para a camada
+        detectada, com os sinais bloqueados durante a configuração.
+        """
+        combo = QgsMapLayerComboBox()
+        combo.blockSignals(True)
+        try:
+            combo.setFilters(filtro)
+            self._auto_set_combo(combo, chave)
+        finally:
+            combo.blockSignals(False)
+        return combo
+
     def _auto_set_combo(self, combo: QgsMapLayerComboBox, chave: str):
         if combo is None:
             return
@@ -10,6 +10,9 @@ class ZoniV2Plugin:
         self.action = None
         self.dialogo = None
         self.controlador = None
+        # Classes da interface, importadas na primeira abertura da janela
+        self._ZoniDialog = None
+        self._ControladorUI = None
 
     def initGui(self):
         self.action = QAction(QIcon(), "Zôni v2 – Análise", self.iface.mainWindow())
@@ -22,17 +25,25 @@ class ZoniV2Plugin:
             self.iface.removePluginMenu("Zôni v2", self.action)
             self.iface.removeToolBarIcon(self.action)
 
+        # Índices espaciais e códigos de zona guardados entre análises
+        from .infraestrutura.espacial.indice_espacial import limpar_caches_camadas
+
+        limpar_caches_camadas()
+
         # Se quiser, pode limpar coisas do controlador aqui depois
         self.controlador = None
         self.dialogo = None
 
     def abrir_janela_principal(self):
-        from .interface.qt.zoni_dialog import ZoniDialog
-        from .interface.qt.controlador_ui import ControladorUI
-
         if self.dialogo is None:
-            self.dialogo = ZoniDialog(self.iface)
-            self.controlador = ControladorUI(self.dialogo, self.iface)
+            if self._ZoniDialog is None:
+                from .interface.qt.zoni_dialog import ZoniDialog
+                from .interface.qt.controlador_ui import ControladorUI
+
+                self._ZoniDialog, self._ControladorUI = ZoniDialog, ControladorUI
+
+            self.dialogo = self._ZoniDialog(self.iface)
+            self.controlador = self._ControladorUI(self.dialogo, self.iface)
 
         self.dialogo.show()
         self.dialogo.raise_()
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Classificação das classes de risco no relatório HTML."""
+
+import pytest
+
+from ..infraestrutura.relatorios.renderizador_html import _classificar_risco
+
+
+@pytest.mark.parametrize(
+    "classe, grau",
+    [
+        ("Muito Baixa", "MUITO BAIXA"),
+        ("MB", "MUITO BAIXA"),
+        ("Classe MB - muito baixa", "MUITO BAIXA"),
+        ("1", "MUITO BAIXA"),
+        ("Alta", "ALTA"),
+        ("Média", "MÉDIA"),
+        ("Baixa", "BAIXA"),
+        # "MB" dentro de outra palavra não pode virar MUITO BAIXA
+        ("Alta (zona 5 - Embasamento)", "ALTA"),
+        ("Média - Combinada", "MÉDIA"),
+    ],
+)
+def test_grau_risco(classe, grau):
+    assert _classificar_risco(classe).grau == grau